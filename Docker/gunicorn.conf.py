@@ -0,0 +1,6 @@
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    # Удаляет значения gauge с режимом livesum завершившегося воркера
+    multiprocess.mark_process_dead(worker.pid)
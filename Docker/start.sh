@@ -4,4 +4,9 @@ Docker/migrate.sh
 
 echo "Starting FastAPI server..."
 
-gunicorn src.app:app --bind 0.0.0.0:8000 -w 4 -k uvicorn.workers.UvicornWorker
+# Каждый воркер пишет метрики в эту директорию, /metrics собирает их со всех воркеров
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus_multiproc}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+gunicorn src.app:app --bind 0.0.0.0:8000 -w 4 -k uvicorn.workers.UvicornWorker -c Docker/gunicorn.conf.py
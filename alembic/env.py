@@ -22,6 +22,7 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 from src.models import Base
 from src.auth import models
+from src.notifications import models
 from src.settings import settings
 
 
@@ -0,0 +1,98 @@
+"""
+Общие функции бенчмарков: измерение времени вызова, сохранение результатов
+в JSON и загрузка прошлого запуска для сравнения.
+"""
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(benchmark: str) -> Dict[str, Any]:
+    return {
+        "benchmark": benchmark,
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+    }
+
+
+def save_result(
+    result: Dict[str, Any], output: Optional[Path], suffix: str = ""
+) -> Path:
+    """
+    Сохраняет результат в output или в benchmarks/results/<benchmark>_<время><suffix>.json.
+    """
+    output = output or RESULTS_DIR / (
+        f"{result['benchmark']}_{datetime.now():%Y%m%d_%H%M%S}{suffix}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+    print(f"saved to {output}")
+    return output
+
+
+def load_baseline(path: Optional[Path]) -> Optional[Dict[str, Any]]:
+    return json.loads(path.read_text()) if path else None
+
+
+def change(current: float, previous: Optional[float]) -> str:
+    if not previous:
+        return ""
+    return f"{(current / previous - 1) * 100:>8.1f}%"
+
+
+def measure(func: Callable[[], object], seconds: float) -> Dict[str, float]:
+    """
+    Вызывает func сериями в течение seconds и возвращает статистику времени
+    одного вызова (min/median/mean/stddev в микросекундах) и ops/s.
+    """
+    # Подбираем размер серии так, чтобы одна серия шла не меньше 1 мс,
+    # иначе для быстрых функций основной вклад даст сам таймер
+    inner = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(inner):
+            func()
+        if time.perf_counter() - started >= 0.001:
+            break
+        inner *= 2
+
+    timings = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline or len(timings) < 5:
+        started = time.perf_counter()
+        for _ in range(inner):
+            func()
+        timings.append((time.perf_counter() - started) / inner)
+
+    median = statistics.median(timings)
+    return {
+        "rounds": len(timings),
+        "calls_per_round": inner,
+        "min_us": min(timings) * 1e6,
+        "median_us": median * 1e6,
+        "mean_us": statistics.mean(timings) * 1e6,
+        "stddev_us": statistics.stdev(timings) * 1e6,
+        "ops": 1 / median,
+    }
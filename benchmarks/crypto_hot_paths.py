@@ -0,0 +1,156 @@
+"""
+Микробенчмарки криптографических операций, которые задают минимальную
+стоимость запроса по CPU:
+
+- get_hash / is_matched_hash (bcrypt) для разных значений rounds;
+- JWTServices.create / decode для RS256, ES256, EdDSA и HS256;
+- TelegramAuthService._is_matched_hash;
+- BaseOTPService._generate_code и проверка HMAC OTP-кода.
+
+Каждая функция вызывается сериями в течение --seconds; для серии
+измеряется время одного вызова, в отчет попадают min/median/mean/stddev
+и количество операций в секунду (как в pytest-benchmark). Результаты
+сохраняются в JSON (--output), с --baseline выводится изменение медианы
+относительно прошлого запуска.
+
+Запуск:
+    python -m benchmarks.crypto_hot_paths [--seconds 1] [--bcrypt-rounds 10 11 12 13]
+        [--filter bcrypt] [--output FILE] [--baseline FILE]
+"""
+
+import argparse
+import hashlib
+import hmac
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from passlib.context import CryptContext
+
+from benchmarks.common import change, load_baseline, measure, metadata, save_result
+from benchmarks.jwt_algorithms import generate_key
+from src.settings import settings
+from src.auth import schemas as auth_schemas
+from src.auth import utils as auth_utils
+from src.auth.services.auth import TelegramAuthService
+from src.auth.services.jwt import JWTKeyRing, JWTServices
+from src.otp.service import BaseOTPService
+from src.otp.utils import get_otp_hash, is_matched_otp_hash
+
+PASSWORD = "correct horse battery staple"
+
+
+def bcrypt_cases(rounds_list: List[int]) -> List[Tuple[str, Callable]]:
+    cases = []
+    for rounds in rounds_list:
+        context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+
+        def hash_case(context=context):
+            auth_utils.pwd_context = context
+            return lambda: auth_utils.get_hash(PASSWORD)
+
+        def verify_case(context=context):
+            auth_utils.pwd_context = context
+            hashed = auth_utils.get_hash(PASSWORD)
+            return lambda: auth_utils.is_matched_hash(PASSWORD, hashed)
+
+        cases.append((f"bcrypt_hash[rounds={rounds}]", hash_case))
+        cases.append((f"bcrypt_verify[rounds={rounds}]", verify_case))
+    return cases
+
+
+def jwt_cases() -> List[Tuple[str, Callable]]:
+    cases = []
+    for algorithm in ("RS256", "ES256", "EdDSA", "HS256"):
+        keyring = JWTKeyRing(keys=[generate_key(algorithm)], signing_kid=algorithm)
+
+        def create_case(keyring=keyring):
+            JWTServices.keyring = keyring
+            return lambda: JWTServices.create(current_user_id=1)
+
+        def decode_case(keyring=keyring):
+            JWTServices.keyring = keyring
+            token = JWTServices.create(current_user_id=1).access_token
+            return lambda: JWTServices.decode(token=token)
+
+        cases.append((f"jwt_create[{algorithm}]", create_case))
+        cases.append((f"jwt_decode[{algorithm}]", decode_case))
+    return cases
+
+
+def telegram_case():
+    settings.telegram_bot.token = "123456:bench"
+    data = {
+        "id": 123456789,
+        "first_name": "Bench",
+        "last_name": "User",
+        "username": "bench_user",
+        "photo_url": "https://t.me/i/userpic/320/bench.jpg",
+        "auth_date": int(time.time()),
+    }
+    data_check_string = "\n".join(
+        sorted(f"{key}={value}" for key, value in data.items())
+    )
+    secret_key = hashlib.sha256(settings.telegram_bot.token.encode()).digest()
+    request = auth_schemas.TelegramRequest(
+        **data,
+        hash=hmac.new(
+            secret_key, data_check_string.encode(), hashlib.sha256
+        ).hexdigest(),
+    )
+    return lambda: TelegramAuthService._is_matched_hash(telegram_request=request)
+
+
+def otp_verify_case():
+    code = BaseOTPService._generate_code()
+    hashed = get_otp_hash(code)
+    return lambda: is_matched_otp_hash(code=code, hashed=hashed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument(
+        "--bcrypt-rounds", type=int, nargs="+", default=[10, 11, 12, 13]
+    )
+    parser.add_argument("--filter", default="")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    args = parser.parse_args()
+
+    # Каждый случай - фабрика, которая готовит данные и возвращает
+    # измеряемую функцию
+    cases = [
+        *bcrypt_cases(args.bcrypt_rounds),
+        *jwt_cases(),
+        ("telegram_is_matched_hash", telegram_case),
+        ("otp_generate_code", lambda: BaseOTPService._generate_code),
+        ("otp_verify_hmac", otp_verify_case),
+    ]
+    baseline = (load_baseline(args.baseline) or {}).get("cases", {})
+
+    print(f"{'case':<28}{'median us':>12}{'stddev us':>12}{'ops/s':>12}{'rounds':>8}")
+    results = {}
+    for name, factory in cases:
+        if args.filter not in name:
+            continue
+        stats = measure(factory(), args.seconds)
+        results[name] = stats
+        previous = baseline.get(name, {}).get("median_us")
+        print(
+            f"{name:<28}{stats['median_us']:>12.1f}{stats['stddev_us']:>12.1f}"
+            f"{stats['ops']:>12.0f}{stats['rounds']:>8}{change(stats['median_us'], previous)}"
+        )
+
+    save_result(
+        {
+            **metadata("crypto_hot_paths"),
+            "config": {"seconds": args.seconds, "bcrypt_rounds": args.bcrypt_rounds},
+            "cases": results,
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Сравнение стоимости подписи и проверки JWT для поддерживаемых алгоритмов.
+
+Ключи генерируются в памяти, токены выпускаются и проверяются через
+JWTServices с подмененным keyring, то есть по тому же пути, что и при логине.
+
+Запуск:
+    python -m benchmarks.jwt_algorithms [--seconds 2]
+"""
+
+import argparse
+import secrets
+
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from benchmarks.common import measure
+from src.auth.services.jwt import JWTKey, JWTKeyRing, JWTServices
+
+
+def generate_key(algorithm: str) -> JWTKey:
+    if algorithm == "HS256":
+        secret = secrets.token_bytes(32)
+        return JWTKey(
+            kid=algorithm, algorithm=algorithm, signing_key=secret, verifying_key=secret
+        )
+
+    if algorithm == "RS256":
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm == "ES256":
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    else:
+        private_key = ed25519.Ed25519PrivateKey.generate()
+
+    return JWTKey(
+        kid=algorithm,
+        algorithm=algorithm,
+        signing_key=private_key,
+        verifying_key=private_key.public_key(),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    print(f"{'algorithm':<10}{'sign/s':>12}{'verify/s':>12}{'sign us':>10}{'verify us':>11}")
+    for algorithm in ("RS256", "ES256", "EdDSA", "HS256"):
+        JWTServices.keyring = JWTKeyRing(
+            keys=[generate_key(algorithm)], signing_kid=algorithm
+        )
+        token = JWTServices.create(current_user_id=1).access_token
+
+        sign = measure(lambda: JWTServices.create(current_user_id=1), args.seconds)
+        verify = measure(lambda: JWTServices.verify(token=token), args.seconds)
+        print(
+            f"{algorithm:<10}{sign['ops']:>12.0f}{verify['ops']:>12.0f}"
+            f"{sign['median_us']:>10.1f}{verify['median_us']:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Бенчмарк проверки JWT на текущих RS256-ключах.
+
+"before" повторяет прежнюю логику UserService.get_me: PEM передается строкой,
+токен декодируется дважды (JWTServices.is_valid и JWTServices.decode).
+"after" - JWTServices.verify с заранее загруженным объектом ключа.
+
+Запуск:
+    python -m benchmarks.jwt_verify [--seconds 3]
+"""
+
+import argparse
+from datetime import datetime
+
+import jwt
+
+from benchmarks.common import measure
+from src.settings import settings
+from src.auth.services.jwt import JWTServices
+
+
+def verify_before(token: str, public_key_pem: str) -> int:
+    payload = jwt.decode(
+        token, key=public_key_pem, algorithms=[settings.auth_jwt.algorithm]
+    )
+    if datetime.fromtimestamp(payload.get("exp")) <= datetime.now():
+        raise ValueError("expired")
+    payload = jwt.decode(
+        token, key=public_key_pem, algorithms=[settings.auth_jwt.algorithm]
+    )
+    return int(payload["sub"])
+
+
+def verify_after(token: str) -> int:
+    return JWTServices.verify(token=token).user_id
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    token = JWTServices.create(current_user_id=1).access_token
+    public_key_pem = settings.auth_jwt.public_key_path.read_text()
+
+    before = measure(lambda: verify_before(token, public_key_pem), args.seconds)["ops"]
+    after = measure(lambda: verify_after(token), args.seconds)["ops"]
+
+    print(f"algorithm: {settings.auth_jwt.algorithm}")
+    print(f"before: {before:10.0f} verifies/s")
+    print(f"after:  {after:10.0f} verifies/s")
+    print(f"speedup: x{after / before:.2f}")
+
+
+if __name__ == "__main__":
+    main()
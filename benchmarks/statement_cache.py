@@ -0,0 +1,184 @@
+"""
+Накладные расходы Python на запросы поиска пользователя.
+
+Сравнивает запрос, который строится на каждый вызов, как раньше в
+BaseDAO.find_one_or_none и UserService.get:
+    select(User).filter().filter_by(email=...)
+с готовым запросом с параметром (_lookup_statement), который создается
+один раз и хранит свой ключ кэша компиляции, а также загрузку ORM-объектов
+с последующим model_validate с чтением только нужных колонок в схему через
+TypeAdapter (BaseDAO.find_one_as, USER_PROFILE_STMT).
+
+Случаи:
+- build: построение запроса и вычисление ключа кэша - то, что SQLAlchemy
+  делает на каждый вызов до обращения к базе;
+- execute: полный вызов session.execute на SQLite в памяти (синхронная
+  сессия, чтобы не добавлять шум event loop; разница та же, что и в async);
+- to_schema: execute и преобразование результата в схему ответа.
+
+Запуск:
+    python -m benchmarks.statement_cache [--seconds 1] [--output FILE] [--baseline FILE]
+"""
+
+import argparse
+from pathlib import Path
+from typing import Callable, Dict
+
+from sqlalchemy import bindparam, create_engine, select
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.pool import StaticPool
+
+from benchmarks.common import change, load_baseline, measure, metadata, save_result
+from src.models import Base
+from src.dao import _columns_lookup_statement, _lookup_statement, type_adapter
+from src.auth import models as auth_models
+from src.auth import schemas as auth_schemas
+from src.auth.services.user import USER_PROFILE_STMT
+
+User = auth_models.User
+EMAIL = "user1@example.com"
+PREBUILT_PROFILE = (
+    select(User)
+    .options(selectinload(User.telegram))
+    .where(User.id == bindparam("id"))
+)
+PAIRS = [
+    ("lookup_build", "dynamic", "prebuilt"),
+    ("lookup_execute", "dynamic", "prebuilt"),
+    ("lookup_to_schema", "orm", "rows"),
+    ("profile_build", "dynamic", "prebuilt"),
+    ("profile_execute", "dynamic", "prebuilt"),
+    ("profile_to_schema", "orm", "rows"),
+]
+
+
+def dynamic_lookup():
+    return select(User).filter().filter_by(email=EMAIL)
+
+
+def dynamic_profile():
+    return select(User).options(selectinload(User.telegram)).where(User.id == 1)
+
+
+def make_session() -> Session:
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    session.add(User(id=1, email=EMAIL, hashed_password="x"))
+    session.add(
+        auth_models.Telegram(
+            id=1, first_name="A", username="a", photo_url="http://x", user_id=1
+        )
+    )
+    session.commit()
+    return session
+
+
+def cases(session: Session) -> Dict[str, Callable[[], object]]:
+    def execute(stmt_factory, params=None):
+        def run():
+            user = session.execute(stmt_factory(), params).scalars().one_or_none()
+            # Каждый вызов загружает объект заново, как в отдельном запросе
+            session.expunge_all()
+            return user
+
+        return run
+
+    def lookup_from_row():
+        # Как в BaseDAO.find_one_as
+        row = session.execute(lookup_columns, {"email": EMAIL}).one_or_none()
+        return type_adapter(auth_schemas.User).validate_python(
+            row, from_attributes=True
+        )
+
+    def profile_from_row():
+        # Как в UserService._find
+        row = session.execute(USER_PROFILE_STMT, {"id": 1}).one_or_none()
+        telegram = None
+        if row.telegram_id is not None:
+            telegram = {
+                "first_name": row.first_name,
+                "last_name": row.last_name,
+                "username": row.username,
+                "photo_url": row.photo_url,
+            }
+        return type_adapter(auth_schemas.UserResponse).validate_python(
+            {
+                "id": row.id,
+                "email": row.email,
+                "telephone": row.telephone,
+                "telegram": telegram,
+            }
+        )
+
+    lookup = _lookup_statement(User, "email")
+    lookup_columns = _columns_lookup_statement(User, auth_schemas.User, "email")
+    lookup_orm = execute(lambda: lookup, {"email": EMAIL})
+    profile_orm = execute(lambda: PREBUILT_PROFILE, {"id": 1})
+    return {
+        "lookup_build[dynamic]": lambda: dynamic_lookup()._generate_cache_key(),
+        "lookup_build[prebuilt]": lambda: lookup._generate_cache_key(),
+        "lookup_execute[dynamic]": execute(dynamic_lookup),
+        "lookup_execute[prebuilt]": execute(lambda: lookup, {"email": EMAIL}),
+        "profile_build[dynamic]": lambda: dynamic_profile()._generate_cache_key(),
+        "profile_build[prebuilt]": lambda: PREBUILT_PROFILE._generate_cache_key(),
+        "profile_execute[dynamic]": execute(dynamic_profile),
+        "profile_execute[prebuilt]": profile_orm,
+        "lookup_to_schema[orm]": lambda: auth_schemas.User.model_validate(lookup_orm()),
+        "lookup_to_schema[rows]": lookup_from_row,
+        "profile_to_schema[orm]": lambda: auth_schemas.UserResponse.model_validate(
+            profile_orm()
+        ),
+        "profile_to_schema[rows]": profile_from_row,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    args = parser.parse_args()
+
+    baseline = (load_baseline(args.baseline) or {}).get("cases", {})
+    session = make_session()
+
+    print(f"{'case':<28}{'median us':>12}{'stddev us':>12}{'ops/s':>12}")
+    results = {}
+    for name, func in cases(session).items():
+        stats = measure(func, args.seconds)
+        results[name] = stats
+        previous = baseline.get(name, {}).get("median_us")
+        print(
+            f"{name:<28}{stats['median_us']:>12.1f}{stats['stddev_us']:>12.1f}"
+            f"{stats['ops']:>12.0f}{change(stats['median_us'], previous)}"
+        )
+
+    print()
+    saved = {}
+    for name, before, after in PAIRS:
+        before_us = results[f"{name}[{before}]"]["median_us"]
+        after_us = results[f"{name}[{after}]"]["median_us"]
+        saved[name] = before_us - after_us
+        print(
+            f"{name:<28}saved {before_us - after_us:>8.1f} us per call "
+            f"({(1 - after_us / before_us) * 100:.0f}%)"
+        )
+
+    save_result(
+        {
+            **metadata("statement_cache"),
+            "config": {"seconds": args.seconds},
+            "cases": results,
+            "saved_us": saved,
+        },
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Задержка поиска пользователя по email, телефону и telegrams.user_id
+на большой таблице users.
+
+Создает отдельную SQLite-базу, заполняет ее пользователями и замеряет
+запросы тем же способом, что и EmailAuthMethodWithPassword.get_user.
+С флагом --no-indexes индексы удаляются, чтобы сравнить с полным сканированием.
+
+Запуск:
+    python -m benchmarks.user_lookup [--users 1000000] [--lookups 2000] [--no-indexes]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.models import Base
+from src.auth import models as auth_models
+from src.auth import dao as auth_dao
+from src.settings import DbSettings
+from src.database import create_engine
+
+CHUNK_SIZE = 10_000
+
+
+def email(i: int) -> str:
+    return f"user{i}@example.com"
+
+
+def telephone(i: int) -> str:
+    return f"7{i:010d}"
+
+
+async def seed(engine, users: int) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    for start in range(0, users, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, users)
+        async with engine.begin() as conn:
+            await conn.execute(
+                insert(auth_models.User),
+                [
+                    {
+                        "id": i + 1,
+                        "email": email(i),
+                        "telephone": telephone(i),
+                        "hashed_password": "x",
+                    }
+                    for i in range(start, stop)
+                ],
+            )
+            await conn.execute(
+                insert(auth_models.Telegram),
+                [
+                    {
+                        "id": 10**9 + i,
+                        "first_name": "first",
+                        "username": f"user{i}",
+                        "photo_url": "",
+                        "user_id": i + 1,
+                    }
+                    for i in range(start, stop, 10)
+                ],
+            )
+        print(f"\rseeded {stop}/{users}", end="", flush=True)
+    print()
+
+
+async def measure(session_maker, lookups: int, users: int, field: str, factory):
+    timings = []
+    async with session_maker() as session:
+        for _ in range(lookups):
+            value = factory(random.randrange(users))
+            started = time.perf_counter()
+            if field == "user_id":
+                await auth_dao.TelegramDao.find_one_or_none(session, user_id=value)
+            else:
+                await auth_dao.UserDao.find_one_or_none(session, **{field: value})
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+    return (
+        statistics.median(timings) * 1000,
+        timings[int(len(timings) * 0.99) - 1] * 1000,
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--no-indexes", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(
+            DbSettings(url=f"sqlite:///{Path(tmp) / 'bench.sqlite3'}")
+        )
+        await seed(engine, args.users)
+
+        if args.no_indexes:
+            async with engine.begin() as conn:
+                for index in (
+                    "users_email_idx",
+                    "users_telephone_idx",
+                    "telegrams_user_id_idx",
+                ):
+                    await conn.execute(text(f"DROP INDEX {index}"))
+
+        session_maker = async_sessionmaker(bind=engine, expire_on_commit=False)
+        lookups = args.lookups if not args.no_indexes else min(args.lookups, 50)
+        print(
+            f"users: {args.users}, indexes: {not args.no_indexes}, lookups: {lookups}"
+        )
+        for field, factory in (
+            ("email", email),
+            ("telephone", telephone),
+            ("user_id", lambda i: i + 1),
+        ):
+            p50, p99 = await measure(session_maker, lookups, args.users, field, factory)
+            print(f"{field:<10} p50 {p50:8.3f} ms   p99 {p99:8.3f} ms")
+
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
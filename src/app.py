@@ -4,21 +4,56 @@ from fastapi.staticfiles import StaticFiles
 
 
 from src.settings import settings
+from src.database import replica_router
 from src.auth import routers as auth_routers
+from src.auth.utils import hashing_pool
+from src.otp.sweeper import temp_user_sweeper
+from src.otp.store import otp_store
+from src.email.service import smtp_pool
+from src.sms.service import sms_client
+from src.ratelimit.limiter import rate_limiter
+from src.monitoring.metrics import PrometheusMiddleware
+from src.monitoring.routers import monitoring_router, profiling_router
+from src.monitoring.tracing import TracingMiddleware, setup_tracing, shutdown_tracing
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    setup_tracing()
+    if settings.temp_user_sweeper.enabled:
+        temp_user_sweeper.start()
+    replica_router.start()
     yield
+    await replica_router.stop()
+    await temp_user_sweeper.stop()
+    await otp_store.close()
+    await smtp_pool.close()
+    await sms_client.close()
+    await rate_limiter.close()
+    hashing_pool.shutdown()
+    shutdown_tracing()
 
 
 app = FastAPI(
     title="Authentication-Backend-TechConnect",
     description="",
     debug=settings.debug,
+    lifespan=lifespan,
 )
 
 app.mount("/static", StaticFiles(directory="src/static"), name="static")
 
 app.include_router(router=auth_routers.template_auth_router, prefix="")
 app.include_router(router=auth_routers.auth_router, prefix="/api")
+
+if settings.metrics.enabled:
+    app.add_middleware(PrometheusMiddleware)
+    app.include_router(router=monitoring_router)
+
+if settings.profiling.token:
+    app.include_router(router=profiling_router)
+
+# Добавляется последним, чтобы быть внешним middleware: span запроса
+# охватывает и запись метрик
+if settings.tracing.exporter != "none":
+    app.add_middleware(TracingMiddleware)
@@ -0,0 +1,123 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set
+
+
+from src.settings import settings
+from src.auth import schemas as auth_schemas
+from src.monitoring.metrics import TOKEN_CACHE_ENTRIES, TOKEN_CACHE_LOOKUPS
+
+
+@dataclass(slots=True)
+class CachedToken:
+    claims: auth_schemas.TokenClaims
+    user: auth_schemas.UserResponse
+    expires_at: float
+
+
+class TokenCache:
+    """
+    In-process LRU/TTL кэш проверенных JWT-токенов.
+
+    Ключ - SHA-256 от токена, значение - декодированные claims и UserResponse.
+    Запись живет до exp токена, но не дольше ttl_seconds.
+
+    Параметры:
+    - max_size: int - максимальное количество записей.
+    - ttl_seconds: int - максимальное время жизни записи.
+    - enabled: bool - если False, кэш ничего не хранит.
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.token_cache.max_size,
+        ttl_seconds: int = settings.token_cache.ttl_seconds,
+        enabled: bool = settings.token_cache.enabled,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, CachedToken]" = OrderedDict()
+        self._keys_by_user: Dict[int, Set[str]] = {}
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[CachedToken]:
+        """
+        Возвращает запись для токена или None, если ее нет или она устарела.
+        """
+        if not self.enabled:
+            return None
+
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            TOKEN_CACHE_LOOKUPS.labels("miss").inc()
+            return None
+
+        if entry.expires_at <= time.time():
+            self._remove(key)
+            TOKEN_CACHE_ENTRIES.set(len(self._entries))
+            TOKEN_CACHE_LOOKUPS.labels("miss").inc()
+            return None
+
+        self._entries.move_to_end(key)
+        TOKEN_CACHE_LOOKUPS.labels("hit").inc()
+        return entry
+
+    def set(
+        self,
+        token: str,
+        claims: auth_schemas.TokenClaims,
+        user: auth_schemas.UserResponse,
+    ) -> None:
+        """
+        Сохраняет проверенный токен вместе с пользователем.
+        """
+        if not self.enabled:
+            return
+
+        expires_at = min(time.time() + self.ttl_seconds, float(claims.exp))
+
+        key = self._key(token)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = CachedToken(
+            claims=claims, user=user, expires_at=expires_at
+        )
+        self._keys_by_user.setdefault(user.id, set()).add(key)
+
+        while len(self._entries) > self.max_size:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+        TOKEN_CACHE_ENTRIES.set(len(self._entries))
+
+    def invalidate_user(self, user_id: int) -> None:
+        """
+        Удаляет все записи пользователя. Вызывается при изменении пользователя.
+        """
+        for key in self._keys_by_user.pop(user_id, set()):
+            self._entries.pop(key, None)
+        TOKEN_CACHE_ENTRIES.set(len(self._entries))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_user.clear()
+        TOKEN_CACHE_ENTRIES.set(0)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry.user.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry.user.id]
+
+
+token_cache = TokenCache()
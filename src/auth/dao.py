@@ -1,6 +1,21 @@
+from typing import Optional
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
 from src.auth import models
 from src.auth import schemas
 from src import dao as auth_dao
+from src.monitoring.metrics import track_query
+from src.monitoring.tracing import traced_query
+
+
+# Пользователь по id Telegram одним запросом с JOIN
+USER_BY_TELEGRAM_ID_STMT = (
+    select(*auth_dao.schema_columns(models.User, schemas.User))
+    .join(models.Telegram, models.Telegram.user_id == models.User.id)
+    .where(models.Telegram.id == bindparam("telegram_id"))
+)
 
 
 class UserDao(
@@ -12,6 +27,32 @@ class UserDao(
 ):
     model = models.User
 
+    @classmethod
+    @track_query
+    @traced_query
+    async def find_one_by_telegram_id(
+        cls, session: AsyncSession, telegram_id: int
+    ) -> Optional[schemas.User]:
+        """
+        Находит пользователя, к которому привязан Telegram с данным id.
+
+        Параметры:
+        - session: AsyncSession - Сессия базы данных.
+        - telegram_id: int - id пользователя Telegram.
+
+        Возвращает:
+        - Optional[schemas.User]: Найденный пользователь или None.
+        """
+        result = await session.execute(
+            USER_BY_TELEGRAM_ID_STMT, {"telegram_id": telegram_id}
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        return auth_dao.type_adapter(schemas.User).validate_python(
+            row, from_attributes=True
+        )
+
 
 class TempUserDao(
     auth_dao.BaseDAO[
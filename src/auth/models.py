@@ -43,20 +43,40 @@ class Telegram(Base):
     username: Mapped[str] = mapped_column(String(255), nullable=False)
     photo_url: Mapped[str] = mapped_column(String(2048), nullable=False)
 
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id"),
+        unique=True,
+        index=True,
+    )
     user: Mapped["User"] = relationship("User", back_populates="telegram")
 
 
 class User(AbstractUser):
     __tablename__ = "users"
 
+    # Значения хранятся нормализованными (email в нижнем регистре,
+    # телефон без "+"), поэтому уникальные индексы строятся по самим колонкам
+    email: Mapped[str] = mapped_column(
+        String(255),
+        nullable=True,
+        unique=True,
+        index=True,
+    )
+
+    telephone: Mapped[str] = mapped_column(
+        String(20),
+        nullable=True,
+        unique=True,
+        index=True,
+    )
+
     telegram: Mapped["Telegram"] = relationship("Telegram", back_populates="user")
 
 
 class TempUser(AbstractUser):
     __tablename__ = "temp_users"
 
-    exp: Mapped[datetime] = mapped_column(nullable=False)
+    exp: Mapped[datetime] = mapped_column(nullable=False, index=True)
 
     otp_code: Mapped[str] = mapped_column(
         String(255),
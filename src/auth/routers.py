@@ -1,6 +1,5 @@
 from fastapi import (
     APIRouter,
-    BackgroundTasks,
     Depends,
     Query,
     Response,
@@ -9,6 +8,7 @@ from fastapi import (
 )
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 from src.auth.services.auth import (
@@ -20,11 +20,15 @@ from src.auth import schemas as auth_schemas
 from src.auth.services.user import UserService
 from src.settings import settings
 from src.auth.services.jwt import TokenService
+from src.database import UnitOfWorkRoute, get_session
+from src.ratelimit.service import RateLimitService
 
 templates = Jinja2Templates(directory="src/auth/templates")
 
 
-template_auth_router = APIRouter(tags=["Templates"], prefix="/auth")
+template_auth_router = APIRouter(
+    tags=["Templates"], prefix="/auth", route_class=UnitOfWorkRoute
+)
 
 
 @template_auth_router.get("/register/", response_class=HTMLResponse)
@@ -70,7 +74,7 @@ async def templates_profile(
 
 ######### API #############
 
-auth_router = APIRouter(tags=["Auth"], prefix="/auth")
+auth_router = APIRouter(tags=["Auth"], prefix="/auth", route_class=UnitOfWorkRoute)
 
 
 # EMAIL
@@ -79,8 +83,9 @@ auth_router = APIRouter(tags=["Auth"], prefix="/auth")
     response_model=auth_schemas.TempUserResponce,
 )
 async def email_register(
+    request: Request,
     register_data: auth_schemas.EmailRegisterRequest,
-    background_tasks: BackgroundTasks,
+    session: AsyncSession = Depends(get_session),
 ) -> auth_schemas.TempUserResponce:
     """
     Регистрирует пользователя по электронной почте.
@@ -91,9 +96,10 @@ async def email_register(
     Возвращает:
     - TempUserResponce: Временный ID пользователя, созданного для подтверждения.
     """
+    await RateLimitService.check_register(request, register_data.email)
     temp_user_id = await EmailAuthService.register(
+        session=session,
         register_data=register_data,
-        background_tasks=background_tasks,
     )
     return auth_schemas.TempUserResponce(id=temp_user_id)
 
@@ -102,7 +108,11 @@ async def email_register(
     "/otp/email/",
     status_code=status.HTTP_201_CREATED,
 )
-async def otp_email(otp_data: auth_schemas.OTPRequest) -> None:
+async def otp_email(
+    request: Request,
+    otp_data: auth_schemas.OTPRequest,
+    session: AsyncSession = Depends(get_session),
+) -> None:
     """
     Подтверждает OTP-код для временного пользователя, зарегистрированного по email.
 
@@ -112,13 +122,18 @@ async def otp_email(otp_data: auth_schemas.OTPRequest) -> None:
     Возвращает:
     - None: Сообщение подтверждено, если OTP-код корректен.
     """
-    await EmailAuthService.otp(temp_user_id=otp_data.temp_user_id, code=otp_data.code)
+    await RateLimitService.check_otp(request)
+    await EmailAuthService.otp(
+        session=session, temp_user_id=otp_data.temp_user_id, code=otp_data.code
+    )
 
 
 @auth_router.post("/login/email/", response_model=auth_schemas.Token)
 async def email_login(
+    request: Request,
     response: Response,
     login_data: auth_schemas.EmailLoginRequest,
+    session: AsyncSession = Depends(get_session),
 ) -> auth_schemas.Token:
     """
     Авторизует пользователя по email и паролю, возвращая JWT-токен при успешной авторизации.
@@ -130,7 +145,9 @@ async def email_login(
     Возвращает:
     - Token: JWT-токен, предоставляющий доступ к защищенным ресурсам.
     """
+    await RateLimitService.check_login(request, login_data.email)
     return await EmailAuthService.login(
+        session=session,
         response=response,
         login_data=login_data,
     )
@@ -150,6 +167,7 @@ async def attach_telegram(
     auth_date: int = Query(..., alias="auth_date"),
     hash: str = Query(..., alias="hash"),
     current_user: auth_schemas.User = Depends(UserService.get_me),
+    session: AsyncSession = Depends(get_session),
 ):
     """
     Привязывает аккаунт Telegram к существующему пользователю.
@@ -177,6 +195,7 @@ async def attach_telegram(
         hash=hash,
     )
     await TelegramAuthService.attach(
+        session=session,
         telegram_request=telegram_request,
         current_user=current_user,
     )
@@ -196,6 +215,7 @@ async def telegram_login(
     photo_url: str = Query(..., alias="photo_url"),
     auth_date: int = Query(..., alias="auth_date"),
     hash: str = Query(..., alias="hash"),
+    session: AsyncSession = Depends(get_session),
 ):
     """
     Авторизует пользователя через Telegram.
@@ -223,6 +243,7 @@ async def telegram_login(
         hash=hash,
     )
     await TelegramAuthService.login(
+        session=session,
         response=response,
         telegram_request=telegram_request,
     )
@@ -235,8 +256,9 @@ async def telegram_login(
     response_model=auth_schemas.TempUserResponce,
 )
 async def telephone_register(
+    request: Request,
     register_data: auth_schemas.TelephoneRegisterRequest,
-    background_tasks: BackgroundTasks,
+    session: AsyncSession = Depends(get_session),
 ) -> auth_schemas.TempUserResponce:
     """
     Регистрирует пользователя по номеру телефона.
@@ -247,9 +269,10 @@ async def telephone_register(
     Возвращает:
     - TempUserResponce: Временный ID пользователя, созданного для подтверждения.
     """
+    await RateLimitService.check_register(request, register_data.telephone)
     temp_user_id = await TelephoneAuthService.register(
+        session=session,
         register_data=register_data,
-        background_tasks=background_tasks,
     )
     return auth_schemas.TempUserResponce(id=temp_user_id)
 
@@ -258,7 +281,11 @@ async def telephone_register(
     "/otp/telephone/",
     status_code=status.HTTP_201_CREATED,
 )
-async def otp_telephone(otp_data: auth_schemas.OTPRequest) -> None:
+async def otp_telephone(
+    request: Request,
+    otp_data: auth_schemas.OTPRequest,
+    session: AsyncSession = Depends(get_session),
+) -> None:
     """
     Подтверждает OTP-код для временного пользователя, зарегистрированного по номеру телефона.
 
@@ -268,15 +295,18 @@ async def otp_telephone(otp_data: auth_schemas.OTPRequest) -> None:
     Возвращает:
     - None: Успешное подтверждение OTP-кода.
     """
+    await RateLimitService.check_otp(request)
     await TelephoneAuthService.otp(
-        temp_user_id=otp_data.temp_user_id, code=otp_data.code
+        session=session, temp_user_id=otp_data.temp_user_id, code=otp_data.code
     )
 
 
 @auth_router.post("/login/telephone/", response_model=auth_schemas.Token)
 async def telephone_login(
+    request: Request,
     response: Response,
     login_data: auth_schemas.TelephoneLoginRequest,
+    session: AsyncSession = Depends(get_session),
 ) -> auth_schemas.Token:
     """
     Авторизует пользователя по номеру телефона и паролю, возвращая JWT-токен при успешной авторизации.
@@ -288,7 +318,9 @@ async def telephone_login(
     Возвращает:
     - Token: JWT-токен, предоставляющий доступ к защищенным ресурсам.
     """
+    await RateLimitService.check_login(request, login_data.telephone)
     return await TelephoneAuthService.login(
+        session=session,
         response=response,
         login_data=login_data,
     )
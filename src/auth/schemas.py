@@ -5,6 +5,7 @@ from pydantic import (
     EmailStr,
     Field,
     field_validator,
+    model_validator,
 )
 from typing import Optional
 
@@ -14,18 +15,27 @@ class AbstractTelephoneForAuth(BaseModel):
 
     @field_validator("telephone", mode="before")
     @classmethod
-    def validate_name(cls, v):
+    def validate_telephone(cls, v):
         if not re.match(r"^\+7\d{10}$", v):
             raise ValueError("Номер телефона должен быть в формате +7XXXXXXXXXX")
         return v[1:]
 
 
+class AbstractEmailForAuth(BaseModel):
+    email: EmailStr
+
+    @field_validator("email", mode="after")
+    @classmethod
+    def normalize_email(cls, v):
+        return v.lower()
+
+
 class AbstractPasswordForAuth(BaseModel):
     password: str
 
     @field_validator("password", mode="before")
     @classmethod
-    def validate_name(cls, v):
+    def validate_password(cls, v):
         if not (0 < len(v) < 256):
             raise ValueError("Длинна пароля должена быть больше 0 и меньше 256")
         return v
@@ -35,8 +45,8 @@ class AbstractLoginRequest(AbstractPasswordForAuth):
     pass
 
 
-class EmailLoginRequest(AbstractLoginRequest):
-    email: EmailStr
+class EmailLoginRequest(AbstractEmailForAuth, AbstractLoginRequest):
+    pass
 
 
 class TelephoneLoginRequest(AbstractTelephoneForAuth, AbstractLoginRequest):
@@ -47,8 +57,8 @@ class AbstractRegisterRequest(AbstractPasswordForAuth):
     pass
 
 
-class EmailRegisterRequest(AbstractRegisterRequest):
-    email: EmailStr
+class EmailRegisterRequest(AbstractRegisterRequest, AbstractEmailForAuth):
+    pass
 
 
 class TelephoneRegisterRequest(AbstractRegisterRequest, AbstractTelephoneForAuth):
@@ -112,6 +122,46 @@ class User(AbstractUser):
         from_attributes = True
 
 
+class UserImportRecord(BaseModel):
+    """
+    Запись пользователя из файла импорта. Пароль передается либо открытым
+    текстом (password), либо готовым хэшем (hashed_password).
+    """
+
+    email: Optional[EmailStr] = None
+    telephone: Optional[str] = None
+    password: Optional[str] = None
+    hashed_password: Optional[str] = None
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def empty_to_none(cls, v):
+        # В CSV отсутствующее значение - пустая строка
+        return v or None
+
+    @field_validator("email", mode="after")
+    @classmethod
+    def normalize_email(cls, v):
+        return v.lower() if v else v
+
+    @field_validator("telephone", mode="after")
+    @classmethod
+    def validate_telephone(cls, v):
+        if v is not None and not re.match(r"^\+?7\d{10}$", v):
+            raise ValueError("Номер телефона должен быть в формате +7XXXXXXXXXX")
+        return v.lstrip("+") if v else v
+
+    @model_validator(mode="after")
+    def check_fields(self):
+        if not (self.email or self.telephone):
+            raise ValueError("Нужен email или телефон")
+        if bool(self.password) == bool(self.hashed_password):
+            raise ValueError("Нужен либо password, либо hashed_password")
+        if self.password and not (0 < len(self.password) < 256):
+            raise ValueError("Длинна пароля должена быть больше 0 и меньше 256")
+        return self
+
+
 class UserCreateDB(AbstractUser):
     pass
 
@@ -157,6 +207,16 @@ class TempUserUpdateDB(TempUserCreateDB):
     id: int
 
 
+class TokenClaims(BaseModel):
+    sub: str = Field(pattern=r"^\d+$")
+    exp: int
+    iat: int
+
+    @property
+    def user_id(self) -> int:
+        return int(self.sub)
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "Bearer"
@@ -1,17 +1,18 @@
 import abc
 import time
+from typing import Optional
 from fastapi import (
-    BackgroundTasks,
     HTTPException,
     Response,
     status,
 )
-from sqlalchemy import select
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 import hmac
 import hashlib
 
 
-from src.database import async_session_maker
+from src.database import on_commit, read_replica, replica_router, use_primary
 from src.auth import schemas as auth_schemas
 from src.auth import dao as auth_dao
 from src.auth import models as auth_models
@@ -21,9 +22,12 @@ from src.otp.service import (
     TelephoneOTPService,
     TempUserService,
 )
-from src.auth.utils import get_hash, is_matched_hash
+from src.auth.utils import get_hash_async, is_matched_hash_async
 from src.auth.services.jwt import JWTServices, TokenService
+from src.auth.cache import token_cache
 from src.settings import settings
+from src.monitoring.tracing import traced
+from src.ratelimit.service import RateLimitService
 
 
 class AuthMethodWithPassword(abc.ABC):
@@ -37,12 +41,15 @@ class AuthMethodWithPassword(abc.ABC):
 
     @classmethod
     async def get_user(
-        self, register_data: auth_schemas.AbstractRegisterRequest
+        self,
+        session: AsyncSession,
+        register_data: auth_schemas.AbstractRegisterRequest,
     ) -> auth_schemas.User:
         """
         Получает пользователя на основе данных регистрации.
 
         Параметры:
+        - session: AsyncSession - сессия базы данных.
         - register_data: AbstractRegisterRequest - данные для регистрации пользователя.
 
         Возвращает:
@@ -53,12 +60,14 @@ class AuthMethodWithPassword(abc.ABC):
     @classmethod
     async def create_user_from_temp_user(
         self,
+        session: AsyncSession,
         temp_user_data: auth_schemas.TempUser,
     ) -> auth_schemas.User:
         """
         Создает пользователя из временного пользователя, удаляя временные данные.
 
         Параметры:
+        - session: AsyncSession - сессия базы данных.
         - temp_user_data: TempUser - временные данные пользователя.
 
         Возвращает:
@@ -67,32 +76,38 @@ class AuthMethodWithPassword(abc.ABC):
         Исключения:
         - HTTPException: Если пользователь с таким идентификатором уже существует.
         """
-        async with async_session_maker() as session:
-
-            if await self.get_user(user_data=temp_user_data) is not None:
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail="User with this identifier already exists",
-                )
+        if await self.get_user(session=session, user_data=temp_user_data) is not None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="User with this identifier already exists",
+            )
 
-            await auth_dao.TempUserDao.delete(session=session, id=temp_user_data.id)
+        await TempUserService.delete(session=session, id=temp_user_data.id)
 
-            user_db = await auth_dao.UserDao.add(
-                session,
-                auth_schemas.UserCreateDB(**temp_user_data.model_dump(), telegram=None),
+        user_db = await auth_dao.UserDao.add(
+            session,
+            auth_schemas.UserCreateDB(**temp_user_data.model_dump(), telegram=None),
+        )
+        if user_db is None:
+            # Вставка не прошла уникальный индекс: пользователя успели создать
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="User with this identifier already exists",
             )
-            await session.commit()
 
         return auth_schemas.User.model_validate(user_db)
 
     @classmethod
     async def find_user_and_check_password(
-        self, login_data: auth_schemas.AbstractLoginRequest
+        self,
+        session: AsyncSession,
+        login_data: auth_schemas.AbstractLoginRequest,
     ) -> auth_schemas.User:
         """
         Находит пользователя и проверяет его пароль.
 
         Параметры:
+        - session: AsyncSession - сессия базы данных.
         - login_data: AbstractLoginRequest - данные для входа пользователя.
 
         Возвращает:
@@ -101,11 +116,11 @@ class AuthMethodWithPassword(abc.ABC):
         Исключения:
         - HTTPException: Если идентификатор или пароль неверны.
         """
-        user_data = await self.get_user(user_data=login_data)
+        user_data = await self.get_user(session=session, user_data=login_data)
 
         if not (
             user_data
-            and is_matched_hash(
+            and await is_matched_hash_async(
                 word=login_data.password, hashed=user_data.hashed_password
             )
         ):
@@ -126,28 +141,27 @@ class EmailAuthMethodWithPassword(AuthMethodWithPassword):
     OTPServis = EmailOTPService
 
     @classmethod
+    @read_replica
     async def get_user(
-        self, 
-        user_data: auth_schemas.UserCreateDB
+        self,
+        session: AsyncSession,
+        user_data: auth_schemas.UserCreateDB,
     ) -> auth_schemas.User:
         """
         Получает пользователя на основе данных электронной почты.
 
         Параметры:
+        - session: AsyncSession - сессия базы данных.
         - user_data: UserCreateDB - данные для поиска пользователя по электронной почте.
 
         Возвращает:
         - auth_schemas.User: Объект пользователя, если найден, иначе None.
         """
-        async with async_session_maker() as session:
-            user = await auth_dao.UserDao.find_one_or_none(
-                session=session,
-                email=user_data.email,
-            )
-            if user is not None:
-                return auth_schemas.User.model_validate(user)
-
-            return None
+        return await auth_dao.UserDao.find_one_as(
+            session,
+            auth_schemas.User,
+            email=user_data.email,
+        )
 
 
 class TelephoneAuthMethodWithPassword(AuthMethodWithPassword):
@@ -159,28 +173,27 @@ class TelephoneAuthMethodWithPassword(AuthMethodWithPassword):
     OTPServis = TelephoneOTPService
 
     @classmethod
+    @read_replica
     async def get_user(
-        self, 
-        user_data: auth_schemas.UserCreateDB
+        self,
+        session: AsyncSession,
+        user_data: auth_schemas.UserCreateDB,
     ) -> auth_schemas.User:
         """
         Получает пользователя на основе данных телефона.
 
         Параметры:
+        - session: AsyncSession - сессия базы данных.
         - user_data: UserCreateDB - данные для поиска пользователя по номеру телефона.
 
         Возвращает:
         - auth_schemas.User: Объект пользователя, если найден, иначе None.
         """
-        async with async_session_maker() as session:
-            user = await auth_dao.UserDao.find_one_or_none(
-                session=session,
-                telephone=user_data.telephone,
-            )
-            if user is not None:
-                return auth_schemas.User.model_validate(user)
-
-            return None
+        return await auth_dao.UserDao.find_one_as(
+            session,
+            auth_schemas.User,
+            telephone=user_data.telephone,
+        )
 
 
 class AuthService:
@@ -200,17 +213,18 @@ class AuthService:
         """
         self._method_auth = method_auth
 
+    @traced()
     async def register(
         self,
+        session: AsyncSession,
         register_data: auth_schemas.AbstractRegisterRequest,
-        background_tasks: BackgroundTasks,
     ) -> int:
         """
-        Регистрирует нового пользователя и отправляет OTP.
+        Регистрирует нового пользователя и ставит OTP в очередь на отправку.
 
         Параметры:
+        - session: AsyncSession - сессия базы данных.
         - register_data: AbstractRegisterRequest - данные для регистрации пользователя.
-        - background_tasks: BackgroundTasks - фоновые задачи для обработки.
 
         Возвращает:
         - int: Идентификатор временного пользователя.
@@ -218,26 +232,33 @@ class AuthService:
         Исключения:
         - HTTPException: Если пользователь с таким идентификатором уже существует.
         """
+        # Проверка существования перед записью не должна видеть отставшую реплику
+        use_primary(session)
         user_data = auth_schemas.UserCreateDB(
             **register_data.model_dump(),
-            hashed_password=get_hash(register_data.password),
+            hashed_password=await get_hash_async(register_data.password),
         )
 
-        if await self._method_auth.get_user(user_data=user_data) is not None:
+        if (
+            await self._method_auth.get_user(session=session, user_data=user_data)
+            is not None
+        ):
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="User with this identifier already exists",
             )
 
         temp_user_db_id = await self._method_auth.OTPServis.send(
+            session=session,
             user_data=user_data,
-            background_tasks=background_tasks,
         )
 
         return temp_user_db_id
 
+    @traced()
     async def otp(
         self,
+        session: AsyncSession,
         temp_user_id: int,
         code: str,
     ) -> None:
@@ -245,13 +266,16 @@ class AuthService:
         Проверяет OTP-код и создает пользователя из временных данных.
 
         Параметры:
+        - session: AsyncSession - сессия базы данных.
         - temp_user_id: int - идентификатор временного пользователя.
         - code: str - OTP-код для проверки.
 
         Исключения:
         - HTTPException: Если код неверный.
         """
-        temp_user_db = await TempUserService.get(id=temp_user_id)
+        use_primary(session)
+        temp_user_db = await TempUserService.get(session=session, id=temp_user_id)
+        await RateLimitService.check_otp_attempts(temp_user_db)
 
         if not await self._method_auth.OTPServis.check_otp_code(
             temp_user_data=temp_user_db, code=code
@@ -262,11 +286,14 @@ class AuthService:
             )
 
         user_data = await self._method_auth.create_user_from_temp_user(
+            session=session,
             temp_user_data=temp_user_db,
         )
 
+    @traced()
     async def login(
         self,
+        session: AsyncSession,
         response: Response,
         login_data: auth_schemas.AbstractLoginRequest,
     ) -> auth_schemas.Token:
@@ -274,6 +301,7 @@ class AuthService:
         Выполняет вход пользователя и возвращает токен.
 
         Параметры:
+        - session: AsyncSession - сессия базы данных.
         - response: Response - ответ для установки токена.
         - login_data: AbstractLoginRequest - данные для входа пользователя.
 
@@ -284,7 +312,8 @@ class AuthService:
         - HTTPException: Если идентификатор или пароль неверны.
         """
         user_data = await self._method_auth.find_user_and_check_password(
-            login_data=login_data
+            session=session,
+            login_data=login_data,
         )
 
         token = JWTServices.create(current_user_id=user_data.id)
@@ -307,6 +336,7 @@ class TelegramService:
     @classmethod
     async def attach(
         self,
+        session: AsyncSession,
         telegram_request: auth_schemas.TelegramRequest,
         current_user: auth_schemas.User,
     ) -> None:
@@ -314,6 +344,7 @@ class TelegramService:
         Привязывает Telegram-учетную запись к пользователю.
 
         Параметры:
+        - session: AsyncSession - сессия базы данных.
         - telegram_request: TelegramRequest - запрос на привязку Telegram.
         - current_user: User - текущий аутентифицированный пользователь.
 
@@ -321,46 +352,52 @@ class TelegramService:
         - HTTPException: Если пользователь с таким Telegram уже существует или
           если пользователь уже привязан к Telegram.
         """
-        async with async_session_maker() as session:
-            telegram_db = await auth_dao.TelegramDao.find_one_or_none(
-                session,
-                id=telegram_request.id,
-            )
-            if telegram_db is not None:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="User with this telegram already exists",
+        # Одна вставка без предварительных проверок: занятость id Telegram
+        # и наличие привязки у пользователя проверяют ограничения уникальности
+        # (telegrams.id, telegrams.user_id), конфликт не прерывает транзакцию
+        inserted = await auth_dao.TelegramDao.upsert(
+            session,
+            [
+                auth_schemas.TelegramCreateDB(
+                    **telegram_request.model_dump(),
+                    user_id=current_user.id,
                 )
-            existing_telegram = await session.execute(
-                select(auth_models.Telegram).where(
-                    auth_models.Telegram.user_id == current_user.id
+            ],
+        )
+        if not inserted:
+            # Конфликт: узнаем, какое ограничение нарушено
+            conflicts = await session.execute(
+                select(auth_models.Telegram.id).where(
+                    or_(
+                        auth_models.Telegram.id == telegram_request.id,
+                        auth_models.Telegram.user_id == current_user.id,
+                    )
                 )
             )
-            if existing_telegram.scalars().first() is not None:
+            if telegram_request.id in conflicts.scalars().all():
                 raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail="User already attach telegram",
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="User with this telegram already exists",
                 )
-
-            await auth_dao.TelegramDao.add(
-                session,
-                auth_schemas.TelegramCreateDB(
-                    **telegram_request.model_dump(),
-                    user_id=current_user.id,
-                ),
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="User already attach telegram",
             )
 
-            await session.commit()
+        on_commit(session, lambda: token_cache.invalidate_user(current_user.id))
+        on_commit(session, lambda: replica_router.mark_written(("user", current_user.id)))
 
     @classmethod
     async def find_user_with_this_telegram(
         self,
+        session: AsyncSession,
         telegram_request: auth_schemas.TelegramRequest,
     ) -> auth_schemas.User:
         """
         Находит пользователя по данным Telegram-учетной записи.
 
         Параметры:
+        - session: AsyncSession - сессия базы данных.
         - telegram_request: TelegramRequest - запрос с данными Telegram.
 
         Возвращает:
@@ -369,22 +406,27 @@ class TelegramService:
         Исключения:
         - HTTPException: Если пользователь с данным Telegram не найден.
         """
-        async with async_session_maker() as session:
-            telegram_db = await auth_dao.TelegramDao.find_one_or_none(
-                session,
-                id=telegram_request.id,
-            )
-            if telegram_db is None:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="User with this telegram not found",
-                )
-            user_db = await auth_dao.UserDao.find_one_or_none(
-                session,
-                id=telegram_db.user_id,
+        user = await self._find_user_by_telegram_id(
+            session=session, telegram_id=telegram_request.id
+        )
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User with this telegram not found",
             )
 
-        return auth_schemas.User.model_validate(user_db)
+        return user
+
+    @classmethod
+    @read_replica
+    async def _find_user_by_telegram_id(
+        self,
+        session: AsyncSession,
+        telegram_id: int,
+    ) -> Optional[auth_schemas.User]:
+        return await auth_dao.UserDao.find_one_by_telegram_id(
+            session, telegram_id=telegram_id
+        )
 
 
 class TelegramAuthService:
@@ -428,8 +470,10 @@ class TelegramAuthService:
         return None
 
     @classmethod
+    @traced()
     async def attach(
         self,
+        session: AsyncSession,
         telegram_request: auth_schemas.TelegramRequest,
         current_user: auth_schemas.User,
     ) -> None:
@@ -437,18 +481,22 @@ class TelegramAuthService:
         Привязывает Telegram-учетную запись к текущему пользователю после проверки данных.
 
         Параметры:
+        - session: AsyncSession - сессия базы данных.
         - telegram_request: TelegramRequest - запрос на привязку Telegram.
         - current_user: User - текущий аутентифицированный пользователь.
         """
         self._is_matched_hash(telegram_request=telegram_request)
         await TelegramService.attach(
+            session=session,
             telegram_request=telegram_request,
             current_user=current_user,
         )
 
     @classmethod
+    @traced()
     async def login(
         self,
+        session: AsyncSession,
         response: Response,
         telegram_request: auth_schemas.TelegramRequest,
     ) -> auth_schemas.Token:
@@ -456,6 +504,7 @@ class TelegramAuthService:
         Выполняет вход пользователя через Telegram.
 
         Параметры:
+        - session: AsyncSession - сессия базы данных.
         - response: Response - объект ответа для установки токена.
         - telegram_request: TelegramRequest - запрос с данными Telegram.
 
@@ -467,6 +516,7 @@ class TelegramAuthService:
         """
         self._is_matched_hash(telegram_request=telegram_request)
         user_data = await TelegramService.find_user_with_this_telegram(
+            session=session,
             telegram_request=telegram_request,
         )
         token = JWTServices.create(current_user_id=user_data.id)
@@ -1,55 +1,247 @@
+import base64
+import json
+from dataclasses import dataclass
 from datetime import timedelta, datetime, timezone
+from typing import Any, Dict, List, Optional
 from fastapi.security import OAuth2PasswordBearer
 import jwt
+from cryptography.hazmat.primitives import serialization
+from pydantic import ValidationError
 from fastapi import (
     HTTPException,
-    status,
     Response,
 )
 
 
-from src.settings import settings
+from src.settings import AuthJWT, JWTKeySettings, settings
 from src.auth import schemas as auth_schemas
+from src import exceptions
+from src.monitoring.metrics import track_stage
+
+
+SUPPORTED_ALGORITHMS = ("RS256", "ES256", "EdDSA", "HS256")
+
+
+@dataclass(slots=True)
+class JWTKey:
+    kid: str
+    algorithm: str
+    # None для ключей, которые используются только для проверки
+    signing_key: Any
+    verifying_key: Any
+
+
+class JWTKeyRing:
+    """
+    Набор ключей для подписи и проверки JWT.
+
+    Ключи загружаются один раз, PyJWT получает готовые объекты ключей и не
+    разбирает PEM на каждом вызове. Новые токены подписываются ключом
+    signing_kid и получают kid в заголовке; проверка выбирает ключ по kid,
+    поэтому во время ротации действуют сразу несколько ключей.
+
+    Параметры:
+    - keys: List[JWTKey] - ключи.
+    - signing_kid: str - kid ключа для подписи.
+    - legacy_kid: str - kid ключа для токенов без kid в заголовке.
+    """
+
+    def __init__(
+        self,
+        keys: List[JWTKey],
+        signing_kid: str,
+        legacy_kid: Optional[str] = None,
+    ) -> None:
+        self._keys: Dict[str, JWTKey] = {}
+        for key in keys:
+            if key.algorithm not in SUPPORTED_ALGORITHMS:
+                raise ValueError(f"Unsupported JWT algorithm: {key.algorithm}")
+            if key.kid in self._keys:
+                raise ValueError(f"Duplicate JWT kid: {key.kid}")
+            self._keys[key.kid] = key
+
+        if signing_kid not in self._keys:
+            raise ValueError(f"Unknown JWT signing kid: {signing_kid}")
+        self.signing = self._keys[signing_kid]
+        if self.signing.signing_key is None:
+            raise ValueError(f"JWT key {signing_kid} has no private key")
+
+        self._legacy = self._keys.get(legacy_kid) if legacy_kid else None
+
+    def get(self, kid: Optional[str]) -> Optional[JWTKey]:
+        if kid is None:
+            return self._legacy
+        return self._keys.get(kid)
+
+    @staticmethod
+    def load_key(key_settings: JWTKeySettings) -> JWTKey:
+        """
+        Загружает ключ из настроек.
+        """
+        if key_settings.algorithm == "HS256":
+            if not key_settings.secret:
+                raise ValueError(f"JWT key {key_settings.kid} requires a secret")
+            secret = key_settings.secret.encode()
+            return JWTKey(
+                kid=key_settings.kid,
+                algorithm=key_settings.algorithm,
+                signing_key=secret,
+                verifying_key=secret,
+            )
+
+        signing_key = None
+        if key_settings.private_key_path is not None:
+            signing_key = serialization.load_pem_private_key(
+                key_settings.private_key_path.read_bytes(),
+                password=None,
+            )
+
+        if key_settings.public_key_path is not None:
+            verifying_key = serialization.load_pem_public_key(
+                key_settings.public_key_path.read_bytes(),
+            )
+        elif signing_key is not None:
+            verifying_key = signing_key.public_key()
+        else:
+            raise ValueError(f"JWT key {key_settings.kid} has no key files")
+
+        return JWTKey(
+            kid=key_settings.kid,
+            algorithm=key_settings.algorithm,
+            signing_key=signing_key,
+            verifying_key=verifying_key,
+        )
+
+    @classmethod
+    def from_settings(cls, auth_jwt: AuthJWT) -> "JWTKeyRing":
+        primary = JWTKeySettings(
+            kid=auth_jwt.kid,
+            algorithm=auth_jwt.algorithm,
+            private_key_path=auth_jwt.private_key_path,
+            public_key_path=auth_jwt.public_key_path,
+        )
+        return cls(
+            keys=[cls.load_key(key) for key in [primary, *auth_jwt.extra_keys]],
+            signing_kid=auth_jwt.signing_kid,
+            legacy_kid=auth_jwt.legacy_kid,
+        )
 
 
 class JWTServices:
     """
     Сервис для работы с JSON Web Tokens (JWT).
     """
+
+    keyring = JWTKeyRing.from_settings(settings.auth_jwt)
+
+    _decoder = jwt.PyJWT(
+        options={
+            "require": ["sub", "exp", "iat"],
+            "verify_signature": True,
+            "verify_exp": True,
+            "verify_iat": True,
+        }
+    )
+
     @classmethod
     def encode(
         cls,
         payload: dict,
-        private_key: str = settings.auth_jwt.private_key_path.read_text(),
-        algorithm: str = settings.auth_jwt.algorithm,
     ) -> str:
         """
-        Кодирует данные в JWT-токен.
+        Кодирует данные в JWT-токен ключом подписи из keyring.
 
         Параметры:
         - payload: dict - данные, которые будут закодированы в токен.
-        - private_key: str - закрытый ключ для подписи токена (по умолчанию считывается из настроек).
-        - algorithm: str - алгоритм подписи (по умолчанию берется из настроек).
 
         Возвращает:
-        - str: Закодированный JWT-токен.
+        - str: Закодированный JWT-токен с kid ключа в заголовке.
         """
-        return jwt.encode(payload, key=private_key, algorithm=algorithm)
+        key = cls.keyring.signing
+        with track_stage("jwt_sign"):
+            return jwt.encode(
+                payload,
+                key=key.signing_key,
+                algorithm=key.algorithm,
+                headers={"kid": key.kid},
+            )
+
+    @staticmethod
+    def _get_kid(token: str) -> Optional[str]:
+        # Подпись проверяется позже в decode, здесь нужен только kid.
+        # Разбор вручную заметно дешевле jwt.get_unverified_header.
+        try:
+            header_segment = token.split(".", 1)[0]
+            padding = "=" * (-len(header_segment) % 4)
+            header = json.loads(base64.urlsafe_b64decode(header_segment + padding))
+        except (ValueError, TypeError):
+            raise exceptions.InvalidTokenException
+        if not isinstance(header, dict):
+            raise exceptions.InvalidTokenException
+        kid = header.get("kid")
+        # kid из непроверенного заголовка может быть любым значением JSON
+        if kid is not None and not isinstance(kid, str):
+            raise exceptions.InvalidTokenException
+        return kid
 
     @classmethod
     def decode(
         cls,
         token: str,
-        public_key: str = settings.auth_jwt.public_key_path.read_text(),
-        algorithms: str = settings.auth_jwt.algorithm,
-    ) -> auth_schemas.Token:
+    ) -> dict:
+        """
+        Проверяет подпись, exp и iat токена за один проход и возвращает payload.
+        Ключ для проверки выбирается по kid из заголовка токена.
+
+        Параметры:
+        - token: str - JWT-токен.
+
+        Возвращает:
+        - dict: Payload токена.
+
+        Исключения:
+        - TokenExpiredException: Если срок действия токена истек.
+        - InvalidTokenException: Если токен недействителен.
+        """
         try:
-            return jwt.decode(token, key=public_key, algorithms=[algorithms])
-        except ValueError as ex:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail=f"Could not validate credentials: {ex}",
-            )
+            key = cls.keyring.get(cls._get_kid(token))
+            if key is None:
+                raise exceptions.InvalidTokenException
+            with track_stage("jwt_verify"):
+                return cls._decoder.decode(
+                    token,
+                    key=key.verifying_key,
+                    algorithms=[key.algorithm],
+                    leeway=settings.auth_jwt.leeway_seconds,
+                )
+        except jwt.ExpiredSignatureError:
+            raise exceptions.TokenExpiredException
+        except jwt.PyJWTError:
+            raise exceptions.InvalidTokenException
+
+    @classmethod
+    def verify(
+        cls,
+        token: str,
+    ) -> auth_schemas.TokenClaims:
+        """
+        Проверяет JWT-токен и возвращает типизированные claims.
+
+        Параметры:
+        - token: str - JWT-токен для проверки.
+
+        Возвращает:
+        - TokenClaims: Claims токена.
+
+        Исключения:
+        - TokenExpiredException: Если срок действия токена истек.
+        - InvalidTokenException: Если токен недействителен.
+        """
+        payload = cls.decode(token=token)
+        try:
+            return auth_schemas.TokenClaims.model_validate(payload)
+        except ValidationError:
+            raise exceptions.InvalidTokenException
 
     @classmethod
     def create(
@@ -101,8 +293,11 @@ class JWTServices:
         Возвращает:
         - bool: True, если токен действителен, иначе False.
         """
-        exp = datetime.fromtimestamp(self.decode(token=token).get("exp"))
-        return exp > datetime.now()
+        try:
+            self.verify(token=token)
+        except HTTPException:
+            return False
+        return True
 
 
 class TokenService:
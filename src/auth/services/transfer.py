@@ -0,0 +1,246 @@
+import asyncio
+import csv
+import json
+import logging
+import time
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+from pydantic import ValidationError
+
+
+from src.database import async_session_maker
+from src.auth import dao as auth_dao
+from src.auth import schemas as auth_schemas
+from src.auth.utils import HashingPool, get_hash, pwd_context
+
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FIELDS = ("id", "email", "telephone", "hashed_password")
+
+
+def read_records(
+    file: TextIO, format: str
+) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+    """
+    Построчно читает записи из CSV (с заголовком) или JSONL.
+
+    Возвращает:
+    - Iterator[Tuple[int, Optional[Dict[str, Any]]]]: Номер строки и запись
+      (None, если строку JSONL не удалось разобрать).
+    """
+    if format == "csv":
+        reader = csv.DictReader(file)
+        for record in reader:
+            yield reader.line_num, record
+    elif format == "jsonl":
+        for line_num, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_num, json.loads(line)
+            except ValueError:
+                yield line_num, None
+    else:
+        raise ValueError(f"Unknown format: {format}")
+
+
+class UserImporter:
+    """
+    Импорт пользователей пачками по chunk_size записей.
+
+    Каждая пачка проверяется схемой UserImportRecord, открытые пароли
+    хэшируются параллельно в отдельном HashingPool, после чего пачка
+    добавляется одним многострочным INSERT в своей транзакции. Пока пачка
+    записывается в базу, следующая уже читается и хэшируется, поэтому
+    в памяти одновременно не больше двух пачек.
+
+    Готовые хэши принимаются, только если их формат известен pwd_context
+    (bcrypt), иначе пользователь не сможет войти.
+
+    Параметры:
+    - chunk_size: int - записей в пачке.
+    - on_conflict: str - "skip": пропускать пользователей с уже занятым
+      email или телефоном; "fail": прервать импорт (пачка откатывается).
+    - hashing_pool: HashingPool - пул для хэширования открытых паролей.
+    - progress_interval_seconds: float - как часто писать прогресс в лог.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        on_conflict: str = "skip",
+        hashing_pool: Optional[HashingPool] = None,
+        progress_interval_seconds: float = 5.0,
+    ) -> None:
+        if on_conflict not in ("skip", "fail"):
+            raise ValueError(f"Unknown conflict mode: {on_conflict}")
+        self.chunk_size = chunk_size
+        self.on_conflict = on_conflict
+        self.hashing_pool = hashing_pool or HashingPool(max_queue_size=chunk_size)
+        self.progress_interval_seconds = progress_interval_seconds
+        self._read = 0
+        self._imported = 0
+        self._skipped = 0
+        self._invalid = 0
+        self._hashed = 0
+        self._started = time.monotonic()
+        self._last_progress = self._started
+
+    def _validate(
+        self, line_num: int, record: Optional[Dict[str, Any]]
+    ) -> Optional[auth_schemas.UserImportRecord]:
+        self._read += 1
+        try:
+            if record is None:
+                raise ValueError("invalid JSON")
+            user = auth_schemas.UserImportRecord.model_validate(record)
+            if user.hashed_password and not pwd_context.identify(
+                user.hashed_password, required=False
+            ):
+                raise ValueError("unknown password hash format")
+        except (ValidationError, ValueError) as e:
+            self._invalid += 1
+            logger.warning("Line %s skipped: %s", line_num, e)
+            return None
+        return user
+
+    async def _prepare(
+        self, users: List[auth_schemas.UserImportRecord]
+    ) -> List[Dict[str, Any]]:
+        plaintext = [user for user in users if user.password]
+        hashes = iter(
+            await asyncio.gather(
+                *(
+                    self.hashing_pool.run(
+                        get_hash, user.password, stage="password_hash"
+                    )
+                    for user in plaintext
+                )
+            )
+        )
+        self._hashed += len(plaintext)
+        return [
+            auth_schemas.UserCreateDB(
+                email=user.email,
+                telephone=user.telephone,
+                hashed_password=user.hashed_password or next(hashes),
+            ).model_dump()
+            for user in users
+        ]
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        async with async_session_maker() as session:
+            if self.on_conflict == "skip":
+                # ON CONFLICT DO NOTHING без указания индекса: пропускается
+                # конфликт и по email, и по телефону
+                inserted = len(await auth_dao.UserDao.upsert(session, rows))
+            else:
+                await auth_dao.UserDao.add_many(session, rows, returning=False)
+                inserted = len(rows)
+            await session.commit()
+        self._imported += inserted
+        self._skipped += len(rows) - inserted
+        self._log_progress()
+
+    def _log_progress(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._last_progress < self.progress_interval_seconds:
+            return
+        self._last_progress = now
+        stats = self.stats()
+        logger.info(
+            "Read %s, imported %s, skipped %s, invalid %s: %.0f records/s",
+            stats["read"],
+            stats["imported"],
+            stats["skipped"],
+            stats["invalid"],
+            stats["records_per_second"],
+        )
+
+    async def run(
+        self, records: Iterator[Tuple[int, Optional[Dict[str, Any]]]]
+    ) -> None:
+        """
+        Импортирует записи из итератора read_records.
+        """
+        pending: Optional[asyncio.Task] = None
+        chunk: List[auth_schemas.UserImportRecord] = []
+
+        async def flush() -> None:
+            nonlocal pending, chunk
+            rows = await self._prepare(chunk)
+            chunk = []
+            if pending is not None:
+                await pending
+            pending = asyncio.create_task(self._insert(rows))
+
+        try:
+            for line_num, record in records:
+                user = self._validate(line_num, record)
+                if user is not None:
+                    chunk.append(user)
+                if len(chunk) >= self.chunk_size:
+                    await flush()
+            if chunk:
+                await flush()
+        finally:
+            if pending is not None:
+                await pending
+        self._log_progress(force=True)
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        return {
+            "read": self._read,
+            "imported": self._imported,
+            "skipped": self._skipped,
+            "invalid": self._invalid,
+            "hashed": self._hashed,
+            "elapsed_seconds": elapsed,
+            "records_per_second": self._read / elapsed,
+        }
+
+
+async def export_users(file: TextIO, format: str, batch_size: int = 1000) -> int:
+    """
+    Выгружает пользователей в CSV или JSONL через серверный курсор,
+    не загружая всю таблицу в память.
+
+    Параметры:
+    - file: TextIO - файл для записи.
+    - format: str - "csv" или "jsonl".
+    - batch_size: int - строк, получаемых из базы за раз.
+
+    Возвращает:
+    - int: Количество выгруженных пользователей.
+    """
+    if format not in ("csv", "jsonl"):
+        raise ValueError(f"Unknown format: {format}")
+    writer = csv.DictWriter(file, fieldnames=EXPORT_FIELDS)
+    if format == "csv":
+        writer.writeheader()
+
+    exported = 0
+    started = time.monotonic()
+    async with async_session_maker() as session:
+        async for user in auth_dao.UserDao.stream(session, batch_size=batch_size):
+            row = {field: getattr(user, field) for field in EXPORT_FIELDS}
+            if format == "csv":
+                writer.writerow(row)
+            else:
+                file.write(json.dumps(row, ensure_ascii=False) + "\n")
+            exported += 1
+            if exported % 100_000 == 0:
+                logger.info(
+                    "Exported %s users: %.0f users/s",
+                    exported,
+                    exported / (time.monotonic() - started),
+                )
+    elapsed = max(time.monotonic() - started, 1e-9)
+    logger.info(
+        "Exported %s users in %.1f s: %.0f users/s",
+        exported,
+        elapsed,
+        exported / elapsed,
+    )
+    return exported
@@ -1,17 +1,19 @@
+from typing import Optional
 from fastapi import (
     HTTPException,
     status,
     Depends,
 )
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
-from src.database import async_session_maker
+from src.database import get_session, read_replica, replica_router, use_primary
 from src.auth import schemas as auth_schemas
-from src.auth import dao as auth_dao
+from src.auth import models as auth_models
+from src.dao import type_adapter
 from src.auth.services.jwt import JWTServices
-from src import exceptions
+from src.auth.cache import token_cache
 from src.auth.utils import OAuth2PasswordCookie
 
 
@@ -19,6 +21,26 @@ oauth2_scheme = OAuth2PasswordCookie(
     tokenUrl="/api/auth/login/",
 )
 
+# Профиль с привязанным Telegram одним запросом: выбираются только нужные
+# колонки, строка отображается в UserResponse без создания ORM-объектов.
+# Запрос строится один раз, id передается параметром.
+USER_PROFILE_STMT = (
+    select(
+        auth_models.User.id,
+        auth_models.User.email,
+        auth_models.User.telephone,
+        auth_models.Telegram.id.label("telegram_id"),
+        auth_models.Telegram.first_name,
+        auth_models.Telegram.last_name,
+        auth_models.Telegram.username,
+        auth_models.Telegram.photo_url,
+    )
+    .outerjoin(
+        auth_models.Telegram, auth_models.Telegram.user_id == auth_models.User.id
+    )
+    .where(auth_models.User.id == bindparam("id"))
+)
+
 
 class UserService:
     """
@@ -26,11 +48,12 @@ class UserService:
     """
     
     @staticmethod
-    async def get(id: int) -> auth_schemas.User:
+    async def get(session: AsyncSession, id: int) -> auth_schemas.User:
         """
         Получает пользователя по его ID.
 
         Параметры:
+        - session: AsyncSession - сессия базы данных.
         - id: int - ID пользователя для получения.
 
         Возвращает:
@@ -39,49 +62,75 @@ class UserService:
         Исключения:
         - HTTPException: Если пользователь с указанным ID не найден.
         """
-        async with async_session_maker() as session:
-            stmt = (
-                select(auth_dao.UserDao.model)
-                .options(selectinload(auth_dao.UserDao.model.telegram))
-                .where(auth_dao.UserDao.model.id == id)
+        # Сразу после привязки Telegram реплика может вернуть профиль без нее
+        if replica_router.recently_written(("user", id)):
+            use_primary(session)
+
+        user = await UserService._find(session=session, id=id)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
             )
-            user_db = await session.execute(stmt)
-            user_db = user_db.scalars().one_or_none()
 
-            if user_db is None:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
-                )
+        return user
 
-        return auth_schemas.UserResponse.model_validate(user_db)
+    @staticmethod
+    @read_replica
+    async def _find(
+        session: AsyncSession, id: int
+    ) -> Optional[auth_schemas.UserResponse]:
+        result = await session.execute(USER_PROFILE_STMT, {"id": id})
+        row = result.one_or_none()
+
+        if row is None:
+            return None
+
+        telegram = None
+        if row.telegram_id is not None:
+            telegram = {
+                "first_name": row.first_name,
+                "last_name": row.last_name,
+                "username": row.username,
+                "photo_url": row.photo_url,
+            }
+        return type_adapter(auth_schemas.UserResponse).validate_python(
+            {
+                "id": row.id,
+                "email": row.email,
+                "telephone": row.telephone,
+                "telegram": telegram,
+            }
+        )
 
     @classmethod
     async def get_me(
         self,
         token: str = Depends(oauth2_scheme),
+        session: AsyncSession = Depends(get_session),
     ) -> auth_schemas.User:
         """
         Получает текущего аутентифицированного пользователя.
+        Повторные запросы с тем же токеном обслуживаются из token_cache
+        без проверки подписи и обращения к базе данных.
 
         Параметры:
         - token: str - JWT-токен для аутентификации пользователя (по умолчанию извлекается из зависимости).
+        - session: AsyncSession - сессия базы данных текущего запроса.
 
         Возвращает:
         - User: Объект текущего аутентифицированного пользователя.
 
         Исключения:
-        - InvalidTokenException: Если токен недействителен или истек.
+        - InvalidTokenException: Если токен недействителен.
+        - TokenExpiredException: Если срок действия токена истек.
         """
-        try:
-            if not JWTServices.is_valid(token=token):
-                raise exceptions.TokenExpiredException
+        cached = token_cache.get(token)
+        if cached is not None:
+            return cached.user
 
-            payload = JWTServices.decode(token=token)
-            user_id = payload.get("sub")
-            if user_id is None:
-                raise exceptions.InvalidTokenException
+        claims = JWTServices.verify(token=token)
 
-        except Exception as ex:
-            raise exceptions.InvalidTokenException
+        user = await UserService.get(session=session, id=claims.user_id)
+        token_cache.set(token=token, claims=claims, user=user)
 
-        return await UserService.get(user_id)
+        return user
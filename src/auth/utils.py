@@ -1,10 +1,22 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from passlib.context import CryptContext
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, Optional, Tuple
 from fastapi import HTTPException, Request, status
 from fastapi.openapi.models import OAuthFlows as OAuthFlowsModel
 from fastapi.security import OAuth2
 from fastapi import status
-from passlib.context import CryptContext
+
+
+from src.settings import settings
+from src import exceptions
+from src.monitoring.metrics import (
+    HASHING_POOL_IN_FLIGHT,
+    HASHING_POOL_REJECTED,
+    POOL_WAIT,
+    STAGE_DURATION,
+)
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -18,6 +30,104 @@ def is_matched_hash(word: str, hashed: str) -> bool:
     return pwd_context.verify(word, hashed)
 
 
+def _run_timed(func: Callable[..., Any], *args) -> Tuple[float, Any]:
+    # Выполняется внутри воркера: момент старта нужен для подсчета времени
+    # ожидания в очереди. time.monotonic общий для процессов одной машины,
+    # поэтому годится и для ProcessPoolExecutor.
+    return time.monotonic(), func(*args)
+
+
+class HashingPool:
+    """
+    Ограниченный пул воркеров для bcrypt-хэширования, чтобы не блокировать
+    event loop.
+
+    Параметры:
+    - executor: str - тип пула: "thread" или "process".
+    - max_workers: int - количество воркеров.
+    - max_queue_size: int - сколько задач может ждать свободного воркера.
+      При переполнении поднимается ServiceOverloadedException (503).
+    """
+
+    def __init__(
+        self,
+        executor: str = settings.hashing_pool.executor,
+        max_workers: int = settings.hashing_pool.max_workers,
+        max_queue_size: int = settings.hashing_pool.max_queue_size,
+    ) -> None:
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown hashing pool executor: {executor}")
+        self.executor_type = executor
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+
+    def _get_executor(self) -> Executor:
+        # Пул создается лениво, чтобы воркеры gunicorn не наследовали его при fork
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="hashing",
+                )
+        return self._executor
+
+    async def run(
+        self, func: Callable[..., Any], *args, stage: Optional[str] = None
+    ) -> Any:
+        """
+        Выполняет func(*args) в пуле. Время ожидания в очереди записывается
+        в метрику pool_wait_seconds, время выполнения - в
+        auth_stage_duration_seconds с меткой stage (по умолчанию имя функции).
+
+        Исключения:
+        - ServiceOverloadedException: Если очередь пула заполнена.
+        """
+        if self._in_flight >= self.max_workers + self.max_queue_size:
+            HASHING_POOL_REJECTED.inc()
+            raise exceptions.ServiceOverloadedException
+
+        self._in_flight += 1
+        HASHING_POOL_IN_FLIGHT.inc()
+        loop = asyncio.get_running_loop()
+        submitted_at = time.monotonic()
+        try:
+            started_at, result = await loop.run_in_executor(
+                self._get_executor(), _run_timed, func, *args
+            )
+        finally:
+            self._in_flight -= 1
+            HASHING_POOL_IN_FLIGHT.dec()
+
+        finished_at = time.monotonic()
+        POOL_WAIT.labels("hashing").observe(max(started_at - submitted_at, 0.0))
+        STAGE_DURATION.labels(stage or func.__name__).observe(
+            max(finished_at - started_at, 0.0)
+        )
+        return result
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+hashing_pool = HashingPool()
+
+
+async def get_hash_async(word: str) -> str:
+    return await hashing_pool.run(get_hash, word, stage="password_hash")
+
+
+async def is_matched_hash_async(word: str, hashed: str) -> bool:
+    return await hashing_pool.run(
+        is_matched_hash, word, hashed, stage="password_verify"
+    )
+
+
 class OAuth2PasswordCookie(OAuth2):
     """
     Класс для реализации аутентификации OAuth2 с использованием JWT-токена,
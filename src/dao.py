@@ -1,17 +1,66 @@
-from typing import Any, Dict, Generic, List, Optional, TypeVar, Union
-from sqlalchemy import delete, insert, select, update
+import functools
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Type,
+    TypeVar,
+    Union,
+)
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.sql import func
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 
 from src.models import Base
+from src.monitoring.metrics import track_query
+from src.monitoring.tracing import traced_query
 
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
+SchemaType = TypeVar("SchemaType", bound=BaseModel)
+
+
+@functools.cache
+def _lookup_statement(model, field: str):
+    # Объект запроса создается один раз: SQLAlchemy запоминает его ключ
+    # кэша, поэтому при выполнении не нужно ни строить запрос, ни вычислять
+    # ключ для поиска скомпилированного SQL
+    return select(model).where(getattr(model, field) == bindparam(field))
+
+
+@functools.cache
+def type_adapter(schema: Type[SchemaType]) -> TypeAdapter:
+    """
+    Возвращает TypeAdapter схемы. Создание адаптера строит валидатор схемы,
+    поэтому он создается один раз на схему.
+    """
+    return TypeAdapter(schema)
+
+
+@functools.cache
+def schema_columns(model, schema: Type[BaseModel]) -> tuple:
+    """
+    Возвращает колонки таблицы модели, которые есть среди полей схемы.
+    """
+    columns = model.__table__.columns
+    return tuple(columns[name] for name in schema.model_fields if name in columns)
+
+
+@functools.cache
+def _columns_lookup_statement(model, schema: Type[BaseModel], field: str):
+    return select(*schema_columns(model, schema)).where(
+        model.__table__.columns[field] == bindparam(field)
+    )
 
 
 class BaseDAO(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
@@ -25,8 +74,13 @@ class BaseDAO(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
     Методы:
     - find_one_or_none: Находит одну запись или возвращает None.
+    - find_one_as: Находит одну запись и возвращает ее сразу в виде схемы.
     - find_all: Находит все записи с поддержкой фильтрации и пагинации.
     - add: Добавляет новую запись в базу данных.
+    - add_many: Добавляет несколько записей одним многострочным INSERT.
+    - upsert: Добавляет записи, обновляя существующие при конфликте.
+    - iter_batches: Перебирает записи пачками с keyset-пагинацией.
+    - stream: Перебирает записи через серверный курсор.
     - delete: Удаляет записи из базы данных по заданным условиям.
     - update: Обновляет существующую запись в базе данных.
     - count: Подсчитывает количество записей, соответствующих заданным условиям.
@@ -34,12 +88,26 @@ class BaseDAO(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     
     model = None
 
+    @staticmethod
+    def _dump(obj_in: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+        if isinstance(obj_in, dict):
+            return obj_in
+        return obj_in.model_dump(exclude_unset=True)
+
     @classmethod
+    def _primary_key(cls):
+        return cls.model.__mapper__.primary_key[0]
+
+    @classmethod
+    @track_query
+    @traced_query
     async def find_one_or_none(
         cls, session: AsyncSession, *filter, **filter_by
     ) -> Optional[ModelType]:
         """
         Находит одну запись по заданным фильтрам или возвращает None.
+        Поиск по одному полю (find_one_or_none(session, email=...)) выполняется
+        готовым запросом с параметром, без построения нового select.
 
         Параметры:
         - session: AsyncSession - Сессия базы данных.
@@ -49,11 +117,60 @@ class BaseDAO(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         Возвращает:
         - Optional[ModelType]: Найденная запись или None.
         """
+        if not filter and len(filter_by) == 1:
+            ((field, value),) = filter_by.items()
+            # Для None нужен IS NULL, а не "= :field"
+            if value is not None:
+                result = await session.execute(
+                    _lookup_statement(cls.model, field), {field: value}
+                )
+                return result.scalars().one_or_none()
+
         stmt = select(cls.model).filter(*filter).filter_by(**filter_by)
         result = await session.execute(stmt)
         return result.scalars().one_or_none()
 
     @classmethod
+    @track_query
+    @traced_query
+    async def find_one_as(
+        cls, session: AsyncSession, schema: Type[SchemaType], *filter, **filter_by
+    ) -> Optional[SchemaType]:
+        """
+        Быстрое чтение одной записи сразу в схему: выбираются только колонки,
+        соответствующие полям схемы, а строка результата передается в
+        TypeAdapter схемы. ORM-объект не создается и не попадает в сессию,
+        поэтому метод подходит только для чтения.
+
+        Параметры:
+        - session: AsyncSession - Сессия базы данных.
+        - schema: Type[SchemaType] - Схема результата.
+        - filter: Условия фильтрации.
+        - filter_by: Условия фильтрации по именам полей.
+
+        Возвращает:
+        - Optional[SchemaType]: Найденная запись или None.
+        """
+        if not filter and len(filter_by) == 1 and None not in filter_by.values():
+            ((field, value),) = filter_by.items()
+            stmt = _columns_lookup_statement(cls.model, schema, field)
+            result = await session.execute(stmt, {field: value})
+        else:
+            stmt = (
+                select(*schema_columns(cls.model, schema))
+                .filter(*filter)
+                .filter_by(**filter_by)
+            )
+            result = await session.execute(stmt)
+
+        row = result.one_or_none()
+        if row is None:
+            return None
+        return type_adapter(schema).validate_python(row, from_attributes=True)
+
+    @classmethod
+    @track_query
+    @traced_query
     async def find_all(
         cls,
         session: AsyncSession,
@@ -87,6 +204,8 @@ class BaseDAO(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         return result.scalars().all()
 
     @classmethod
+    @track_query
+    @traced_query
     async def add(
         cls, session: AsyncSession, obj_in: Union[CreateSchemaType, Dict[str, Any]]
     ) -> Optional[ModelType]:
@@ -98,7 +217,11 @@ class BaseDAO(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         - obj_in: Union[CreateSchemaType, Dict[str, Any]] - Данные для создания записи.
 
         Возвращает:
-        - Optional[ModelType]: Добавленная запись или None в случае ошибки.
+        - Optional[ModelType]: Добавленная запись или None, если вставка нарушила
+          ограничение целостности (например, уникальный индекс).
+
+        Исключения:
+        - SQLAlchemyError: Остальные ошибки базы данных пробрасываются вызывающему.
         """
         
         if isinstance(obj_in, dict):
@@ -109,16 +232,200 @@ class BaseDAO(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             stmt = insert(cls.model).values(**create_data).returning(cls.model)
             result = await session.execute(stmt)
             return result.scalars().first()
-        except (SQLAlchemyError, Exception) as e:
-            if isinstance(e, SQLAlchemyError):
-                msg = "Database Exc: Cannot insert data into table"
-            elif isinstance(e, Exception):
-                msg = "Unknown Exc: Cannot insert data into table"
-
+        except IntegrityError:
             return None
 
     @classmethod
-    async def delete(cls, session: AsyncSession, *filter, **filter_by) -> None:
+    @track_query
+    @traced_query
+    async def add_many(
+        cls,
+        session: AsyncSession,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        returning: bool = True,
+    ) -> List[ModelType]:
+        """
+        Добавляет несколько записей за один запрос: SQLAlchemy собирает строки
+        в многострочный INSERT ... VALUES (insertmanyvalues), а при returning
+        получает добавленные записи в том же запросе.
+
+        Параметры:
+        - session: AsyncSession - Сессия базы данных.
+        - objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]] - Данные записей.
+        - returning: bool - Возвращать ли добавленные записи.
+
+        Возвращает:
+        - List[ModelType]: Добавленные записи в порядке objs_in
+          (пустой список, если returning=False).
+        """
+        rows = [cls._dump(obj_in) for obj_in in objs_in]
+        if not rows:
+            return []
+        if not returning:
+            await session.execute(insert(cls.model), rows)
+            return []
+        stmt = insert(cls.model).returning(cls.model, sort_by_parameter_order=True)
+        result = await session.scalars(stmt, rows)
+        return result.all()
+
+    @classmethod
+    @track_query
+    @traced_query
+    async def upsert(
+        cls,
+        session: AsyncSession,
+        objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]],
+        index_elements: Optional[Sequence[str]] = None,
+        update_fields: Optional[Sequence[str]] = None,
+    ) -> List[ModelType]:
+        """
+        Добавляет записи через INSERT ... ON CONFLICT (PostgreSQL и SQLite).
+
+        Параметры:
+        - session: AsyncSession - Сессия базы данных.
+        - objs_in: Sequence[Union[CreateSchemaType, Dict[str, Any]]] - Данные записей.
+        - index_elements: Optional[Sequence[str]] - Колонки уникального индекса,
+          по которому определяется конфликт. Без них конфликтом считается
+          нарушение любого уникального ограничения, а существующие записи
+          не меняются.
+        - update_fields: Optional[Sequence[str]] - Колонки, которые обновляются
+          у существующей записи. По умолчанию - все переданные колонки, кроме
+          index_elements; пустой список - существующие записи не меняются.
+          Задается только вместе с index_elements.
+
+        Возвращает:
+        - List[ModelType]: Добавленные и обновленные записи. Записи, пропущенные
+          при пустом update_fields, не возвращаются.
+
+        Исключения:
+        - ValueError: Если update_fields задан без index_elements или диалект
+          базы данных не поддерживает ON CONFLICT.
+        """
+        if index_elements is None and update_fields:
+            raise ValueError("update_fields require index_elements")
+
+        rows = [cls._dump(obj_in) for obj_in in objs_in]
+        if not rows:
+            return []
+
+        dialect = session.get_bind().dialect.name
+        if dialect == "postgresql":
+            stmt = postgresql.insert(cls.model)
+        elif dialect == "sqlite":
+            stmt = sqlite.insert(cls.model)
+        else:
+            raise ValueError(f"Upsert is not supported for dialect {dialect}")
+
+        if index_elements is None:
+            update_fields = []
+        elif update_fields is None:
+            update_fields = [
+                field for field in rows[0] if field not in index_elements
+            ]
+        if update_fields:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={field: stmt.excluded[field] for field in update_fields},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+
+        # populate_existing обновляет объекты, уже загруженные в сессию
+        result = await session.scalars(
+            stmt.returning(cls.model).execution_options(populate_existing=True), rows
+        )
+        return result.all()
+
+    @classmethod
+    @track_query
+    @traced_query
+    async def iter_batches(
+        cls,
+        session: AsyncSession,
+        *filter,
+        batch_size: int = 1000,
+        **filter_by,
+    ) -> AsyncIterator[List[ModelType]]:
+        """
+        Перебирает записи пачками в порядке первичного ключа. Каждая пачка
+        выбирается условием "ключ больше последнего из предыдущей пачки"
+        (keyset-пагинация), поэтому стоимость запроса не растет с номером
+        пачки, в отличие от offset в find_all.
+
+        Параметры:
+        - session: AsyncSession - Сессия базы данных.
+        - filter: Условия фильтрации.
+        - batch_size: int - Размер пачки.
+        - filter_by: Условия фильтрации по именам полей.
+
+        Возвращает:
+        - AsyncIterator[List[ModelType]]: Пачки записей.
+        """
+        primary_key = cls._primary_key()
+        stmt = (
+            select(cls.model)
+            .filter(*filter)
+            .filter_by(**filter_by)
+            .order_by(primary_key)
+            .limit(batch_size)
+        )
+        last_key = None
+        while True:
+            page_stmt = stmt if last_key is None else stmt.where(primary_key > last_key)
+            batch = await cls._fetch_batch(session, page_stmt)
+            if not batch:
+                return
+            yield batch
+            if len(batch) < batch_size:
+                return
+            last_key = getattr(batch[-1], primary_key.key)
+
+    @classmethod
+    @track_query
+    @traced_query
+    async def _fetch_batch(cls, session: AsyncSession, stmt) -> List[ModelType]:
+        result = await session.scalars(stmt)
+        return result.all()
+
+    @classmethod
+    @track_query
+    @traced_query
+    async def stream(
+        cls,
+        session: AsyncSession,
+        *filter,
+        batch_size: int = 1000,
+        **filter_by,
+    ) -> AsyncIterator[ModelType]:
+        """
+        Перебирает записи через серверный курсор: драйвер получает строки
+        порциями по batch_size, и в памяти не хранится весь результат.
+        Выполняется одним запросом и держит соединение до конца перебора.
+
+        Параметры:
+        - session: AsyncSession - Сессия базы данных.
+        - filter: Условия фильтрации.
+        - batch_size: int - Количество строк, получаемых за раз.
+        - filter_by: Условия фильтрации по именам полей.
+
+        Возвращает:
+        - AsyncIterator[ModelType]: Записи в порядке первичного ключа.
+        """
+        stmt = (
+            select(cls.model)
+            .filter(*filter)
+            .filter_by(**filter_by)
+            .order_by(cls._primary_key())
+            .execution_options(yield_per=batch_size)
+        )
+        result = await session.stream_scalars(stmt)
+        async for obj in result:
+            yield obj
+
+    @classmethod
+    @track_query
+    @traced_query
+    async def delete(cls, session: AsyncSession, *filter, **filter_by) -> int:
         """
         Удаляет записи из базы данных по заданным условиям.
 
@@ -126,12 +433,18 @@ class BaseDAO(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         - session: AsyncSession - Сессия базы данных.
         - filter: Условия фильтрации.
         - filter_by: Условия фильтрации по именам полей.
+
+        Возвращает:
+        - int: Количество удаленных записей.
         """
         
         stmt = delete(cls.model).filter(*filter).filter_by(**filter_by)
-        await session.execute(stmt)
+        result = await session.execute(stmt)
+        return result.rowcount
 
     @classmethod
+    @track_query
+    @traced_query
     async def update(
         cls,
         session: AsyncSession,
@@ -162,6 +475,8 @@ class BaseDAO(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         return result.scalars().one()
 
     @classmethod
+    @track_query
+    @traced_query
     async def count(cls, session: AsyncSession, *filter, **filter_by):
         """
         Подсчитывает количество записей, соответствующих заданным условиям.
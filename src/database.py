@@ -1,14 +1,342 @@
+import asyncio
+import functools
+import inspect
+import itertools
+import logging
+import time
+from typing import AsyncIterator, Callable, Dict, Hashable, List, Optional
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import InterfaceError, OperationalError
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
     create_async_engine,
     async_sessionmaker,
 )
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy.pool import QueuePool
 
 
-from src.settings import settings
+from src.settings import DbSettings, settings
+from src.monitoring.metrics import (
+    DB_POOL_CONNECTIONS,
+    DB_REPLICA_READS,
+    DB_REPLICAS_UNHEALTHY,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def _set_sqlite_pragmas(db: DbSettings):
+    def on_connect(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        if db.sqlite_wal:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(db.sqlite_busy_timeout_ms)}")
+        cursor.close()
+
+    return on_connect
+
+
+def _export_pool_stats(engine: AsyncEngine, name: str) -> None:
+    """
+    Отдает статистику пула движка в метрике db_pool_connections.
+
+    Значения читаются из самого пула при каждой выдаче и возврате соединения,
+    поэтому сброшенные и инвалидированные соединения не копят расхождение.
+    Статистику дают только пулы QueuePool (PostgreSQL и файловая SQLite).
+
+    Параметры:
+    - engine: AsyncEngine - движок базы данных.
+    - name: str - значение метки engine.
+    """
+    states = {
+        state: DB_POOL_CONNECTIONS.labels(name, state)
+        for state in ("size", "checked_in", "checked_out", "overflow")
+    }
+
+    def update(returning: int = 0) -> None:
+        # engine.pool заменяется новым пулом при dispose()
+        pool = engine.pool
+        if not isinstance(pool, QueuePool):
+            return
+        size = pool.size()
+        checked_out = pool.checkedout() - returning
+        # Возвращенное соединение ложится в очередь, а если она полна - закрывается
+        checked_in = min(pool.checkedin() + returning, size)
+        states["size"].set(size)
+        states["checked_in"].set(checked_in)
+        states["checked_out"].set(checked_out)
+        states["overflow"].set(max(checked_in + checked_out - size, 0))
+
+    # Событие checkin приходит до того, как соединение вернется в пул
+    event.listen(engine.sync_engine, "checkin", lambda *args: update(returning=1))
+    event.listen(engine.sync_engine, "checkout", lambda *args: update())
+    event.listen(engine.sync_engine, "engine_disposed", lambda *args: update())
+    update()
+
+
+def create_engine(
+    db: DbSettings = settings.db, url: Optional[str] = None
+) -> AsyncEngine:
+    """
+    Создает асинхронный движок базы данных по настройкам.
+
+    Для PostgreSQL настраивается пул соединений (размер, overflow, pre-ping).
+    Для SQLite включается WAL и busy_timeout, чтобы воркеры gunicorn
+    ждали блокировку, а не падали с "database is locked".
+
+    Параметры:
+    - db: DbSettings - настройки базы данных.
+    - url: Optional[str] - адрес реплики (по умолчанию движок primary с db.url).
+
+    Возвращает:
+    - AsyncEngine: Движок базы данных.
+    """
+    is_replica = url is not None
+    url = make_url(url or db.url)
+
+    if url.get_backend_name() == "sqlite":
+        engine = create_async_engine(
+            url,
+            echo=db.echo,
+            connect_args={"timeout": db.sqlite_busy_timeout_ms / 1000},
+        )
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas(db))
+    else:
+        engine = create_async_engine(
+            url,
+            echo=db.echo,
+            pool_size=db.pool_size,
+            max_overflow=db.max_overflow,
+            pool_timeout=db.pool_timeout,
+            pool_recycle=db.pool_recycle,
+            pool_pre_ping=db.pool_pre_ping,
+        )
+
+    # Метка engine в метриках пула: primary или адрес реплики
+    _export_pool_stats(
+        engine, f"replica:{url.host or url.database}" if is_replica else "primary"
+    )
+    return engine
+
+
+class ReplicaRouter:
+    """
+    Выбор реплики для запросов только на чтение.
+
+    Реплики выбираются по кругу. Реплика, на которой запрос завершился
+    ошибкой соединения, исключается до следующей успешной проверки
+    (SELECT 1 раз в health_check_seconds). Если доступных реплик нет,
+    чтение выполняется в primary.
+
+    Для read-your-writes между запросами сервисы отмечают измененные
+    объекты через mark_written: такие объекты read_your_writes_seconds
+    читаются из primary. Отметки хранятся в памяти процесса.
+
+    Параметры:
+    - replicas: List[AsyncEngine] - движки реплик.
+    - health_check_seconds: float - интервал проверки реплик.
+    - read_your_writes_seconds: float - время чтения измененных объектов из primary.
+    """
+
+    def __init__(
+        self,
+        replicas: List[AsyncEngine],
+        health_check_seconds: float = settings.db.replica_health_check_seconds,
+        read_your_writes_seconds: float = settings.db.read_your_writes_seconds,
+    ) -> None:
+        self.replicas = replicas
+        self.health_check_seconds = health_check_seconds
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self._round_robin = itertools.cycle(range(len(replicas) or 1))
+        self._unhealthy: Dict[AsyncEngine, str] = {}
+        self._written: Dict[Hashable, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def choose(self) -> Optional[AsyncEngine]:
+        """
+        Возвращает следующую доступную реплику или None.
+        """
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._round_robin)]
+            if replica not in self._unhealthy:
+                return replica
+        return None
+
+    def mark_failed(self, replica: AsyncEngine, error: BaseException) -> None:
+        if replica not in self._unhealthy:
+            logger.warning("Replica %s is unavailable: %s", replica.url, error)
+        self._unhealthy[replica] = f"{type(error).__name__}: {error}"
+        DB_REPLICAS_UNHEALTHY.set(len(self._unhealthy))
+
+    def mark_written(self, key: Hashable) -> None:
+        now = time.monotonic()
+        self._written = {
+            written_key: until
+            for written_key, until in self._written.items()
+            if until > now
+        }
+        self._written[key] = now + self.read_your_writes_seconds
 
+    def recently_written(self, key: Hashable) -> bool:
+        until = self._written.get(key)
+        return until is not None and until > time.monotonic()
 
-engine = create_async_engine(url=settings.db.url, echo=settings.db.echo)
+    async def check(self) -> None:
+        """
+        Проверяет все реплики и возвращает в работу восстановившиеся.
+        """
+        for replica in self.replicas:
+            try:
+                async with replica.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+            except Exception as e:
+                self.mark_failed(replica, e)
+            else:
+                if self._unhealthy.pop(replica, None) is not None:
+                    logger.info("Replica %s is available again", replica.url)
+                    DB_REPLICAS_UNHEALTHY.set(len(self._unhealthy))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_seconds)
+            await self.check()
+
+    def start(self) -> None:
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="replica-health-check")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.dispose()
+
+
+engine = create_engine()
 
 async_session_maker = async_sessionmaker(
     bind=engine, autoflush=False, autocommit=False, expire_on_commit=False
 )
+
+replica_router = ReplicaRouter(
+    [create_engine(url=url) for url in settings.db.replica_urls]
+)
+
+replica_session_maker = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+
+def use_primary(session: AsyncSession) -> None:
+    """
+    Направляет все дальнейшие чтения сессии в primary. Вызывается перед
+    проверками, за которыми следует запись, а также автоматически после
+    первого изменяющего запроса сессии.
+    """
+    session.info["primary"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _stick_to_primary_after_write(orm_execute_state: ORMExecuteState) -> None:
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["primary"] = True
+
+
+def read_replica(func):
+    """
+    Декоратор для функций, которые только читают данные и принимают
+    параметр session. Функция выполняется в отдельной сессии на реплике,
+    поэтому должна возвращать не ORM-объекты, а схемы.
+
+    Выполняется повторно в исходной сессии (primary), если:
+    - реплик нет или все недоступны, либо сессия уже писала (use_primary);
+    - реплика недоступна (она исключается до следующей проверки);
+    - результат None: запись могла еще не дойти до реплики, например
+      сразу после регистрации.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        arguments = signature.bind(*args, **kwargs).arguments
+        session: AsyncSession = arguments["session"]
+        replica = None if session.info.get("primary") else replica_router.choose()
+        if replica is not None:
+            try:
+                async with replica_session_maker(bind=replica) as replica_session:
+                    arguments["session"] = replica_session
+                    result = await func(**arguments)
+                DB_REPLICA_READS.labels("replica").inc()
+                if result is not None:
+                    return result
+            except (OperationalError, InterfaceError, OSError) as e:
+                replica_router.mark_failed(replica, e)
+            DB_REPLICA_READS.labels("primary_fallback").inc()
+            arguments["session"] = session
+        return await func(**arguments)
+
+    return wrapper
+
+
+async def get_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    Зависимость FastAPI: одна сессия (unit of work) на запрос.
+
+    Все сервисы, вызванные в рамках запроса, получают эту сессию.
+    Транзакция фиксируется в UnitOfWorkRoute после успешной обработки
+    запроса, до отправки ответа, и откатывается, если обработчик или
+    commit завершились исключением.
+    """
+    async with async_session_maker() as session:
+        request.state.db_session = session
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+        else:
+            # Для маршрутов без UnitOfWorkRoute. Начиная с FastAPI 0.118
+            # этот код выполняется уже после отправки ответа
+            await session.commit()
+
+
+class UnitOfWorkRoute(APIRoute):
+    """
+    Маршрут, фиксирующий сессию get_session сразу после обработчика,
+    до отправки ответа. Иначе (FastAPI >= 0.118) commit выполнялся бы
+    при закрытии зависимости, когда клиент уже получил успешный ответ,
+    и ошибка commit не попадала бы в статус ответа.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def unit_of_work_handler(request: Request) -> Response:
+            response = await handler(request)
+            session: Optional[AsyncSession] = getattr(
+                request.state, "db_session", None
+            )
+            if session is not None:
+                await session.commit()
+            return response
+
+        return unit_of_work_handler
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """
+    Вызывает callback после успешного commit сессии.
+    """
+    event.listen(
+        session.sync_session, "after_commit", lambda _: callback(), once=True
+    )
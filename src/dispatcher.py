@@ -0,0 +1,28 @@
+import asyncio
+import logging
+
+
+from src.settings import settings
+from src.notifications.dispatcher import NotificationDispatcher
+from src.email.service import smtp_pool
+from src.sms.service import sms_client
+from src.monitoring.metrics import start_metrics_server
+from src.monitoring.tracing import setup_tracing, shutdown_tracing
+
+
+async def main() -> None:
+    setup_tracing(f"{settings.tracing.service_name}-dispatcher")
+    if settings.metrics.enabled and settings.metrics.dispatcher_port:
+        start_metrics_server(settings.metrics.dispatcher_port)
+    dispatcher = NotificationDispatcher()
+    try:
+        await dispatcher.run()
+    finally:
+        await smtp_pool.close()
+        await sms_client.close()
+        shutdown_tracing()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -1,8 +1,178 @@
-import smtplib
+import asyncio
+import time
+from contextlib import asynccontextmanager
 from email.mime.text import MIMEText
+from typing import AsyncIterator, List, Optional, Tuple
+import aiosmtplib
 
 
 from src.settings import settings
+from src.monitoring.metrics import EMAILS, POOL_WAIT, SMTP_RECONNECTS, STAGE_DURATION
+from src.monitoring.tracing import traced
+
+
+class SMTPConnectionPool:
+    """
+    Пул авторизованных SMTP-соединений.
+
+    Соединения открываются лениво, после отправки возвращаются в пул и
+    переиспользуются, поэтому STARTTLS и LOGIN выполняются один раз на
+    соединение, а не на каждое письмо. Количество одновременных отправок
+    ограничено размером пула. Разорванное соединение переоткрывается,
+    и отправка повторяется один раз.
+
+    Параметры:
+    - hostname: str - адрес SMTP-сервера.
+    - port: int - порт SMTP-сервера.
+    - username: Optional[str] - логин; если не задан, авторизация не выполняется.
+    - password: Optional[str] - пароль.
+    - start_tls: bool - выполнять ли STARTTLS.
+    - size: int - максимальное количество соединений.
+    - timeout: int - таймаут операций в секундах.
+    - idle_timeout: int - максимальное время простоя соединения в секундах.
+    """
+
+    def __init__(
+        self,
+        hostname: str = settings.smtp.server,
+        port: int = settings.smtp.port,
+        username: Optional[str] = settings.smtp.from_address,
+        password: Optional[str] = settings.smtp.from_address_password,
+        start_tls: bool = settings.smtp.start_tls,
+        size: int = settings.smtp.pool_size,
+        timeout: int = settings.smtp.timeout,
+        idle_timeout: int = settings.smtp.idle_timeout,
+    ) -> None:
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.size = size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._idle: List[Tuple[float, aiosmtplib.SMTP]] = []
+        self._semaphore = asyncio.Semaphore(size)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            start_tls=self.start_tls,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        if self.username and self.password:
+            await client.login(self.username, self.password)
+        return client
+
+    @staticmethod
+    async def _close(client: aiosmtplib.SMTP) -> None:
+        try:
+            await client.quit()
+        except Exception:
+            client.close()
+
+    async def _acquire(self) -> aiosmtplib.SMTP:
+        while self._idle:
+            released_at, client = self._idle.pop()
+            if (
+                client.is_connected
+                and time.monotonic() - released_at < self.idle_timeout
+            ):
+                return client
+            await self._close(client)
+        return await self._connect()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        """
+        Выдает соединение из пула. Если внутри блока произошла ошибка,
+        соединение закрывается, иначе возвращается в пул.
+        """
+        waiting_since = time.monotonic()
+        async with self._semaphore:
+            POOL_WAIT.labels("smtp").observe(time.monotonic() - waiting_since)
+            client = await self._acquire()
+            try:
+                yield client
+            except BaseException:
+                client.close()
+                raise
+            self._idle.append((time.monotonic(), client))
+
+    async def send(self, msg: MIMEText, recipients: List[str]) -> None:
+        """
+        Отправляет письмо через соединение из пула.
+
+        Исключения:
+        - aiosmtplib.SMTPException, OSError: Если отправить письмо не удалось.
+        """
+        error = (await self.send_many([(msg, recipients)]))[0]
+        if error is not None:
+            raise error
+
+    async def send_many(
+        self, messages: List[Tuple[MIMEText, List[str]]]
+    ) -> List[Optional[Exception]]:
+        """
+        Отправляет несколько писем подряд через одно соединение из пула,
+        поэтому подключение и авторизация выполняются один раз на пачку.
+        Письмо, отклоненное сервером, не прерывает отправку остальных.
+        Если сервер разорвал соединение, оставшиеся письма отправляются
+        через новое соединение (один раз на пачку).
+
+        Параметры:
+        - messages: List[Tuple[MIMEText, List[str]]] - письма и их получатели.
+
+        Возвращает:
+        - List[Optional[Exception]]: Ошибка для каждого письма в том же порядке
+          или None, если письмо отправлено.
+        """
+        results: List[Optional[Exception]] = [None] * len(messages)
+        index = 0
+        reconnected = False
+        started = time.monotonic()
+
+        while index < len(messages):
+            try:
+                async with self.connection() as client:
+                    while index < len(messages):
+                        msg, recipients = messages[index]
+                        try:
+                            await client.send_message(msg, recipients=recipients)
+                        except (
+                            aiosmtplib.SMTPResponseException,
+                            aiosmtplib.SMTPRecipientsRefused,
+                        ) as ex:
+                            # После отказа aiosmtplib сбрасывает конверт (RSET),
+                            # соединение можно использовать дальше
+                            results[index] = ex
+                        index += 1
+            except (aiosmtplib.SMTPServerDisconnected, ConnectionError) as ex:
+                if reconnected:
+                    results[index:] = [ex] * (len(messages) - index)
+                    break
+                # Сервер закрыл простаивавшее соединение - пробуем с новым
+                reconnected = True
+                SMTP_RECONNECTS.inc()
+            except Exception as ex:
+                results[index:] = [ex] * (len(messages) - index)
+                break
+
+        failed = sum(result is not None for result in results)
+        STAGE_DURATION.labels("smtp_send").observe(time.monotonic() - started)
+        EMAILS.labels("sent").inc(len(messages) - failed)
+        EMAILS.labels("failed").inc(failed)
+        return results
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for _, client in idle:
+            await self._close(client)
+
+
+smtp_pool = SMTPConnectionPool()
 
 
 class EmailService:
@@ -12,8 +182,11 @@ class EmailService:
     Методы:
         send(to_address: str, msg: MIMEText) -> None
             Асинхронно отправляет электронное письмо указанному получателю с заданным сообщением.
+        send_many(messages: List[MIMEText]) -> List[Optional[Exception]]
+            Асинхронно отправляет пачку писем через одно соединение.
     """
     @staticmethod
+    @traced()
     async def send(to_adres: str, msg: MIMEText):
         """
         Отправляет электронное письмо через SMTP-сервер.
@@ -22,20 +195,24 @@ class EmailService:
         - to_address (str): Адрес получателя.
         - msg (MIMEText): Сообщение в формате MIMEText, содержащее текст письма.
 
-        Метод использует настройки SMTP-сервера из settings, включая сервер, порт,
-        адрес отправителя и пароль, чтобы установить соединение с сервером и
-        отправить сообщение. Подключение шифруется с помощью TLS.
+        Письмо отправляется через пул smtp_pool, который держит авторизованные
+        соединения с сервером из настроек открытыми между отправками.
 
         Исключения:
-        - Все исключения при отправке игнорируются.
+        - aiosmtplib.SMTPException, OSError: Если отправить письмо не удалось.
         """
-        try:
-            with smtplib.SMTP(settings.smtp.server, settings.smtp.port) as server:
-                server.starttls()
-                server.login(
-                    settings.smtp.from_address,
-                    settings.smtp.from_address_password,
-                )
-                server.sendmail(settings.smtp.from_address, to_adres, msg.as_string())
-        except Exception as e:
-            pass
+        await smtp_pool.send(msg=msg, recipients=[to_adres])
+
+    @staticmethod
+    @traced()
+    async def send_many(messages: List[MIMEText]) -> List[Optional[Exception]]:
+        """
+        Отправляет пачку писем через одно SMTP-соединение.
+
+        Параметры:
+        - messages (List[MIMEText]): Письма; получатель берется из заголовка To.
+
+        Возвращает:
+        - List[Optional[Exception]]: Ошибка для каждого письма или None, если письмо отправлено.
+        """
+        return await smtp_pool.send_many([(msg, [msg["To"]]) for msg in messages])
@@ -1,3 +1,4 @@
+import math
 from fastapi import HTTPException, status
 
 
@@ -21,3 +22,29 @@ class InvalidCredentialsException(HTTPException):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password",
         )
+
+
+class ServiceOverloadedException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service is overloaded, try again later",
+            headers={"Retry-After": "1"},
+        )
+
+
+class TooManyRequestsException(HTTPException):
+    def __init__(self, retry_after: float):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, try again later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+class ProfilerBusyException(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Profiling is already running in this worker",
+        )
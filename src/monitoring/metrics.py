@@ -0,0 +1,286 @@
+import functools
+import inspect
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+
+
+from src.monitoring.utils import route_path
+
+
+# Метрики Prometheus. При запуске под gunicorn с несколькими воркерами
+# переменная PROMETHEUS_MULTIPROC_DIR должна быть задана до старта
+# воркеров: каждый процесс пишет значения в файлы в этой директории,
+# а /metrics собирает их со всех процессов (см. Docker/start.sh).
+
+FAST_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "Total HTTP requests",
+    ["method", "route", "status"],
+)
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request handling time",
+    ["method", "route"],
+)
+STAGE_DURATION = Histogram(
+    "auth_stage_duration_seconds",
+    "Duration of internal stages: password hashing, JWT sign/verify, "
+    "email and SMS delivery",
+    ["stage"],
+    buckets=FAST_BUCKETS + (5.0, 10.0),
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "DAO method execution time",
+    ["dao", "method"],
+    buckets=FAST_BUCKETS,
+)
+POOL_WAIT = Histogram(
+    "pool_wait_seconds",
+    "Time spent waiting for a free worker or connection in a pool",
+    ["pool"],
+    buckets=FAST_BUCKETS,
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Database pool connections by engine and state: "
+    "size, checked_in, checked_out, overflow",
+    ["engine", "state"],
+    multiprocess_mode="livesum",
+)
+DB_REPLICA_READS = Counter(
+    "db_replica_reads_total",
+    "Read-only lookups routed to replicas: served by a replica "
+    "or fell back to primary",
+    ["result"],
+)
+DB_REPLICAS_UNHEALTHY = Gauge(
+    "db_replicas_unhealthy",
+    "Read replicas excluded after a connection error",
+    multiprocess_mode="livemax",
+)
+HASHING_POOL_IN_FLIGHT = Gauge(
+    "hashing_pool_in_flight",
+    "Hashing tasks running or waiting for a worker",
+    multiprocess_mode="livesum",
+)
+HASHING_POOL_REJECTED = Counter(
+    "hashing_pool_rejected_total",
+    "Hashing tasks rejected with 503 because the pool queue was full",
+)
+TOKEN_CACHE_LOOKUPS = Counter(
+    "token_cache_lookups_total",
+    "Verified-token cache lookups",
+    ["result"],
+)
+TOKEN_CACHE_ENTRIES = Gauge(
+    "token_cache_entries",
+    "Entries in the verified-token cache",
+    multiprocess_mode="livesum",
+)
+EMAILS = Counter(
+    "smtp_messages_total",
+    "Emails handed to the SMTP server",
+    ["result"],
+)
+SMTP_RECONNECTS = Counter(
+    "smtp_reconnects_total",
+    "SMTP batches resumed on a new connection after a disconnect",
+)
+SMS = Counter(
+    "sms_messages_total",
+    "SMS sent through the gateway",
+    ["result"],
+)
+SMS_GATEWAY_REQUESTS = Counter(
+    "sms_gateway_requests_total",
+    "Send requests to the SMS gateway, not counting retries",
+    ["kind"],
+)
+SMS_GATEWAY_RETRIES = Counter(
+    "sms_gateway_retries_total",
+    "SMS gateway requests retried after a 5xx, timeout or network error",
+)
+NOTIFICATIONS = Counter(
+    "notifications_processed_total",
+    "Outbox notifications processed by the dispatcher",
+    ["outcome"],
+)
+NOTIFICATION_BATCH_DURATION = Histogram(
+    "notification_batch_duration_seconds",
+    "Time to claim, deliver and record one notification batch",
+    buckets=FAST_BUCKETS + (5.0, 10.0, 30.0),
+)
+NOTIFICATION_DISPATCH_ERRORS = Counter(
+    "notification_dispatch_errors_total",
+    "Notification batches that failed with an exception",
+)
+TEMP_USERS_PURGED = Counter(
+    "temp_users_purged_total",
+    "Expired temporary users deleted by the sweeper",
+)
+TEMP_USER_SWEEP_DURATION = Histogram(
+    "temp_user_sweep_duration_seconds",
+    "Duration of a temporary user sweep",
+    buckets=FAST_BUCKETS + (5.0, 10.0, 30.0),
+)
+TEMP_USER_SWEEP_ERRORS = Counter(
+    "temp_user_sweep_errors_total",
+    "Failed temporary user sweeps",
+)
+RATE_LIMITED = Counter(
+    "rate_limit_rejected_total",
+    "Requests rejected by the rate limiter",
+)
+RATE_LIMIT_ALLOWED = Counter(
+    "rate_limit_allowed_total",
+    "Requests allowed by the rate limiter",
+)
+RATE_LIMIT_KEYS = Gauge(
+    "rate_limit_memory_keys",
+    "Token buckets held by the in-memory rate limiter",
+    multiprocess_mode="livesum",
+)
+
+
+@contextmanager
+def track_stage(stage: str) -> Iterator[None]:
+    """
+    Измеряет время этапа и записывает его в auth_stage_duration_seconds.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.labels(stage).observe(time.perf_counter() - started)
+
+
+def track_query(func):
+    """
+    Декоратор для методов BaseDAO: записывает время выполнения метода
+    в db_query_duration_seconds с именем DAO и метода. Для асинхронных
+    генераторов учитывается только время внутри генератора, без пауз,
+    пока вызывающий код обрабатывает полученные записи.
+    """
+
+    if inspect.isasyncgenfunction(func):
+
+        @functools.wraps(func)
+        async def generator_wrapper(cls, *args, **kwargs):
+            iterator = func(cls, *args, **kwargs)
+            elapsed = 0.0
+            try:
+                while True:
+                    started = time.perf_counter()
+                    try:
+                        item = await iterator.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    finally:
+                        elapsed += time.perf_counter() - started
+                    yield item
+            finally:
+                await iterator.aclose()
+                DB_QUERY_DURATION.labels(cls.__name__, func.__name__).observe(elapsed)
+
+        return generator_wrapper
+
+    @functools.wraps(func)
+    async def wrapper(cls, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await func(cls, *args, **kwargs)
+        finally:
+            DB_QUERY_DURATION.labels(cls.__name__, func.__name__).observe(
+                time.perf_counter() - started
+            )
+
+    return wrapper
+
+
+class PrometheusMiddleware:
+    """
+    ASGI middleware, записывающий количество и время обработки запросов.
+    В метку route попадает шаблон пути маршрута (например /api/auth/user/me/),
+    а не фактический путь, чтобы число временных рядов не росло.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = route_path(scope) or "unmatched"
+            method = scope["method"]
+            REQUEST_DURATION.labels(method, route).observe(
+                time.perf_counter() - started
+            )
+            REQUESTS.labels(method, route, str(status_code)).inc()
+
+
+def _registry() -> CollectorRegistry:
+    # В многопроцессном режиме значения собираются со всех процессов
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def start_metrics_server(port: int) -> None:
+    """
+    Отдает метрики по HTTP на отдельном порту в фоновом потоке.
+    Используется процессами без FastAPI-приложения (диспетчер уведомлений).
+    """
+    start_http_server(port, registry=_registry())
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Возвращает метрики в текстовом формате Prometheus и их Content-Type.
+    В многопроцессном режиме значения собираются со всех воркеров.
+    """
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
@@ -0,0 +1,105 @@
+import asyncio
+import sys
+import threading
+from collections import Counter
+from typing import Dict, List
+
+
+from src.settings import settings
+from src.exceptions import ProfilerBusyException
+
+
+class StackSampler:
+    """
+    Семплирующий профайлер для работающего воркера.
+
+    Отдельный поток раз в interval_seconds снимает стеки всех потоков
+    процесса (event loop, пул хэширования, потоки драйверов БД) через
+    sys._current_frames и считает, сколько раз встретился каждый стек.
+    Сам профилируемый код не меняется и не замедляется, кроме как на время
+    снятия стеков. Потоки, ожидающие работы, тоже попадают в результат:
+    их легко отфильтровать по корневому кадру с именем потока.
+
+    Функции, выполняемые в ProcessPoolExecutor (hashing_pool.executor =
+    "process"), в результат не попадают - видно только ожидание в воркере.
+
+    Параметры:
+    - interval_seconds: float - интервал между снятиями стеков.
+    """
+
+    def __init__(
+        self, interval_seconds: float = settings.profiling.interval_seconds
+    ) -> None:
+        self.interval_seconds = interval_seconds
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _frame_name(frame) -> str:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", "?")
+        return f"{module}:{code.co_qualname}"
+
+    def _collapse(self, thread_name: str, frame) -> str:
+        names: List[str] = []
+        while frame is not None:
+            names.append(self._frame_name(frame))
+            frame = frame.f_back
+        names.append(thread_name)
+        return ";".join(reversed(names))
+
+    def _run(self, counts: Counter, stop: threading.Event) -> None:
+        own_id = threading.get_ident()
+        while not stop.is_set():
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                thread_name = names.get(thread_id, f"thread-{thread_id}")
+                counts[self._collapse(thread_name, frame)] += 1
+            stop.wait(self.interval_seconds)
+
+    async def sample(self, seconds: float) -> Dict[str, int]:
+        """
+        Снимает стеки в течение seconds секунд.
+
+        Параметры:
+        - seconds: float - длительность профилирования.
+
+        Возвращает:
+        - Dict[str, int]: Количество попаданий каждого стека.
+
+        Исключения:
+        - ProfilerBusyException: В этом процессе уже идет профилирование.
+        """
+        if self._lock.locked():
+            raise ProfilerBusyException
+        async with self._lock:
+            counts: Counter = Counter()
+            stop = threading.Event()
+            thread = threading.Thread(
+                target=self._run,
+                args=(counts, stop),
+                name="stack-sampler",
+                daemon=True,
+            )
+            thread.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                stop.set()
+                await asyncio.to_thread(thread.join)
+            return dict(counts)
+
+
+def format_collapsed(counts: Dict[str, int]) -> str:
+    """
+    Форматирует стеки в формате collapsed stacks ("кадр;кадр;кадр N"),
+    который принимают flamegraph.pl, speedscope и inferno.
+    """
+    return "".join(
+        f"{stack} {count}\n"
+        for stack, count in sorted(counts.items(), key=lambda item: -item[1])
+    )
+
+
+stack_sampler = StackSampler()
@@ -0,0 +1,57 @@
+import hmac
+import os
+from fastapi import APIRouter, Header, Query, Response
+from fastapi.responses import PlainTextResponse
+
+
+from src.settings import settings
+from src.exceptions import InvalidTokenException
+from src.monitoring.metrics import render_metrics
+from src.monitoring.profiling import format_collapsed, stack_sampler
+
+
+monitoring_router = APIRouter(tags=["Monitoring"])
+
+profiling_router = APIRouter(tags=["Monitoring"], prefix="/debug")
+
+
+@monitoring_router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """
+    Отдает метрики в формате Prometheus.
+
+    Возвращает:
+    - Response: Метрики всех процессов приложения.
+    """
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
+@profiling_router.get("/profile", include_in_schema=False)
+async def profile(
+    seconds: float = Query(default=10.0, gt=0, le=settings.profiling.max_seconds),
+    x_profiling_token: str = Header(default=""),
+) -> PlainTextResponse:
+    """
+    Профилирует воркер, принявший запрос, в течение seconds секунд.
+
+    Параметры:
+    - seconds: float - длительность профилирования.
+    - x_profiling_token: str - токен из настройки profiling.token.
+
+    Возвращает:
+    - PlainTextResponse: Стеки в формате collapsed stacks для построения flamegraph.
+      PID профилированного воркера - в заголовке X-Profiled-Pid.
+
+    Исключения:
+    - InvalidTokenException: Неверный токен.
+    - ProfilerBusyException: В этом воркере уже идет профилирование.
+    """
+    if not hmac.compare_digest(
+        x_profiling_token.encode(), settings.profiling.token.encode()
+    ):
+        raise InvalidTokenException
+    counts = await stack_sampler.sample(seconds)
+    return PlainTextResponse(
+        format_collapsed(counts), headers={"X-Profiled-Pid": str(os.getpid())}
+    )
@@ -0,0 +1,184 @@
+import functools
+import inspect
+from typing import Dict, Optional
+from opentelemetry import context, propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+
+from src.settings import settings
+from src.monitoring.utils import route_path
+
+
+# Пока setup_tracing не вызван, tracer из opentelemetry-api ничего не
+# записывает, и декораторы ниже почти ничего не стоят
+tracer = trace.get_tracer("authentication-backend")
+
+_DB_SYSTEM = settings.db.url.split(":", 1)[0].split("+", 1)[0]
+
+
+def setup_tracing(service_name: str = settings.tracing.service_name) -> None:
+    """
+    Настраивает экспорт трейсов по settings.tracing.exporter:
+    "otlp" - в OTLP-коллектор по HTTP, "file" - в файл (по строке JSON на span),
+    "none" - трейсы не записываются.
+
+    Вызывается в каждом процессе после fork (в lifespan приложения
+    и при старте диспетчера), так как экспорт выполняется фоновым потоком.
+    """
+    exporter_name = settings.tracing.exporter
+    if exporter_name == "none":
+        return
+
+    if exporter_name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        exporter = OTLPSpanExporter(endpoint=settings.tracing.otlp_endpoint)
+    elif exporter_name == "file":
+        exporter = ConsoleSpanExporter(
+            out=open(settings.tracing.file_path, "a"),
+            formatter=lambda span: span.to_json(indent=None) + "\n",
+        )
+    else:
+        raise ValueError(f"Unknown tracing exporter: {exporter_name}")
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name})
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+
+
+def shutdown_tracing() -> None:
+    """
+    Отправляет накопленные span и останавливает экспорт.
+    """
+    provider = trace.get_tracer_provider()
+    if isinstance(provider, TracerProvider):
+        provider.shutdown()
+
+
+def traced(name: Optional[str] = None):
+    """
+    Декоратор асинхронной функции или метода: выполняет ее внутри span
+    с именем name (по умолчанию - квалифицированное имя функции).
+    Исключение записывается в span и поднимается дальше.
+    """
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(span_name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def traced_query(func):
+    """
+    Декоратор для методов BaseDAO: span с именем "<DAO>.<метод>".
+    Для асинхронных генераторов (iter_batches, stream) span охватывает весь
+    перебор, а текущим становится только на время работы самого генератора,
+    чтобы не попасть в контекст кода, который перебирает записи.
+    """
+
+    if inspect.isasyncgenfunction(func):
+
+        @functools.wraps(func)
+        async def generator_wrapper(cls, *args, **kwargs):
+            span = tracer.start_span(
+                f"{cls.__name__}.{func.__name__}", kind=SpanKind.CLIENT
+            )
+            span.set_attribute("db.system", _DB_SYSTEM)
+            iterator = func(cls, *args, **kwargs)
+            try:
+                while True:
+                    with trace.use_span(span):
+                        try:
+                            item = await iterator.__anext__()
+                        except StopAsyncIteration:
+                            return
+                    yield item
+            finally:
+                await iterator.aclose()
+                span.end()
+
+        return generator_wrapper
+
+    @functools.wraps(func)
+    async def wrapper(cls, *args, **kwargs):
+        with tracer.start_as_current_span(
+            f"{cls.__name__}.{func.__name__}", kind=SpanKind.CLIENT
+        ) as span:
+            span.set_attribute("db.system", _DB_SYSTEM)
+            return await func(cls, *args, **kwargs)
+
+    return wrapper
+
+
+def current_traceparent() -> Optional[str]:
+    """
+    Возвращает заголовок traceparent текущего span (W3C Trace Context),
+    чтобы связать с ним работу, которая выполнится в другом процессе.
+    """
+    carrier: Dict[str, str] = {}
+    propagate.inject(carrier)
+    return carrier.get("traceparent")
+
+
+def context_from_traceparent(traceparent: Optional[str]) -> context.Context:
+    """
+    Восстанавливает контекст трейса из сохраненного traceparent.
+    """
+    if not traceparent:
+        return context.Context()
+    return propagate.extract({"traceparent": traceparent})
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware, открывающий серверный span на каждый HTTP-запрос.
+    Входящий заголовок traceparent продолжает трейс вызывающей стороны.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {
+            key.decode("latin-1"): value.decode("latin-1")
+            for key, value in scope["headers"]
+        }
+        with tracer.start_as_current_span(
+            scope["method"],
+            context=propagate.extract(headers),
+            kind=SpanKind.SERVER,
+        ) as span:
+
+            async def send_wrapper(message) -> None:
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    span.set_attribute("http.response.status_code", status_code)
+                    if status_code >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+            route = route_path(scope)
+            span.set_attribute("http.request.method", scope["method"])
+            if route is not None:
+                span.set_attribute("http.route", route)
+                span.update_name(f"{scope['method']} {route}")
@@ -0,0 +1,24 @@
+from typing import Optional
+
+
+def route_path(scope) -> Optional[str]:
+    """
+    Возвращает шаблон пути маршрута (например /api/auth/user/me/), который
+    обработал запрос, или None, если маршрут не найден. Маршрутизатор
+    Starlette дописывает найденный маршрут в scope, поэтому функция
+    вызывается после передачи запроса приложению.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    path_regex = getattr(route, "path_regex", None)
+    if template is None or path_regex is None:
+        return template
+
+    # Новые версии FastAPI хранят в scope маршрут роутера без префикса
+    # из app.include_router (и root_path): префикс - часть пути запроса
+    # перед окончанием, с которым совпал маршрут
+    path = scope["path"]
+    for index, char in enumerate(path):
+        if char == "/" and path_regex.match(path[index:]):
+            return path[:index] + template
+    return template
@@ -0,0 +1,13 @@
+from src.notifications import models
+from src.notifications import schemas
+from src import dao as base_dao
+
+
+class NotificationDao(
+    base_dao.BaseDAO[
+        models.Notification,
+        schemas.NotificationCreateDB,
+        schemas.NotificationUpdateDB,
+    ]
+):
+    model = models.Notification
@@ -0,0 +1,391 @@
+import asyncio
+import logging
+import signal
+import time
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+from typing import Dict, List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from opentelemetry import trace
+from opentelemetry.trace import Link, Status, StatusCode
+
+
+from src.settings import settings
+from src.database import async_session_maker
+from src.notifications import dao as notifications_dao
+from src.notifications import models as notifications_models
+from src.notifications import schemas as notifications_schemas
+from src.email.service import EmailService
+from src.sms.service import SMSService
+from src.monitoring.metrics import (
+    NOTIFICATION_BATCH_DURATION,
+    NOTIFICATION_DISPATCH_ERRORS,
+    NOTIFICATIONS,
+)
+from src.monitoring.tracing import tracer, context_from_traceparent
+
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationDispatcher:
+    """
+    Диспетчер очереди уведомлений.
+
+    Забирает из таблицы notifications пачку готовых к отправке уведомлений,
+    помечает их как processing и выставляет next_attempt_at на время аренды,
+    после чего доставляет их пачками: письма по email_batch_size через одно
+    SMTP-соединение, SMS - через SMSService.send_many, который объединяет
+    одинаковые тексты в один запрос к шлюзу. Если пачка неполная, диспетчер
+    ждет coalesce_window_seconds и добирает ее, чтобы уведомления, пришедшие
+    почти одновременно, ушли вместе. Результат учитывается для каждого
+    уведомления отдельно. Если
+    диспетчер упадет, не дойдя до результата, уведомления снова станут
+    доступны после истечения аренды. На PostgreSQL пачка выбирается через
+    FOR UPDATE SKIP LOCKED, поэтому можно запускать несколько диспетчеров.
+
+    Неудачная попытка откладывает уведомление на retry_backoff_seconds * 2^(n-1),
+    после max_attempts попыток уведомление переводится в dead. Истекшая
+    аренда тоже считается попыткой, поэтому уведомление, на котором диспетчер
+    падает или зависает, не повторяется бесконечно. Уведомления с expires_at
+    (OTP-коды) переводятся в dead, если истекли до отправки или истекут до
+    следующей попытки. Текст уведомления очищается после отправки или
+    перевода в dead.
+
+    Пачка выполняется в span NotificationDispatcher.dispatch_batch, а для
+    каждого уведомления в трейсе поставившего его запроса записывается
+    span notification.deliver со ссылкой (link) на span пачки.
+
+    Параметры:
+    - batch_size: int - размер пачки.
+    - poll_interval_seconds: float - пауза, если очередь пуста.
+    - coalesce_window_seconds: float - время добора неполной пачки.
+    - max_attempts: int - максимальное количество попыток.
+    - retry_backoff_seconds: float - базовая задержка между попытками.
+    - lease_seconds: int - время аренды взятого уведомления.
+    - email_batch_size: int - писем на одно SMTP-соединение.
+    - email_concurrency: int - одновременных SMTP-соединений.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.notification_dispatcher.batch_size,
+        poll_interval_seconds: float = settings.notification_dispatcher.poll_interval_seconds,
+        coalesce_window_seconds: float = settings.notification_dispatcher.coalesce_window_seconds,
+        max_attempts: int = settings.notification_dispatcher.max_attempts,
+        retry_backoff_seconds: float = settings.notification_dispatcher.retry_backoff_seconds,
+        lease_seconds: int = settings.notification_dispatcher.lease_seconds,
+        email_batch_size: int = settings.notification_dispatcher.email_batch_size,
+        email_concurrency: int = settings.notification_dispatcher.email_concurrency,
+    ) -> None:
+        self.batch_size = batch_size
+        self.poll_interval_seconds = poll_interval_seconds
+        self.coalesce_window_seconds = coalesce_window_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.email_batch_size = email_batch_size
+        self._email_semaphore = asyncio.Semaphore(email_concurrency)
+        self._stopping = asyncio.Event()
+
+    async def _claim(
+        self, session: AsyncSession, limit: int
+    ) -> List[notifications_schemas.Notification]:
+        now = datetime.now()
+        model = notifications_models.Notification
+        stmt = (
+            select(model)
+            .where(
+                model.status.in_(("pending", "processing")),
+                model.next_attempt_at <= now,
+            )
+            .order_by(model.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.execute(stmt)
+        claimed = []
+        for notification in result.scalars().all():
+            if (
+                notification.expires_at is not None
+                and notification.expires_at <= now
+            ):
+                self._drop(notification, "Expired before delivery")
+                continue
+            if notification.status == "processing":
+                # Аренда истекла: диспетчер упал или завис на этом
+                # уведомлении, это тоже считается попыткой
+                notification.attempts += 1
+                if notification.attempts >= self.max_attempts:
+                    self._drop(
+                        notification,
+                        f"Lease expired after {notification.attempts} attempts",
+                    )
+                    continue
+            notification.status = "processing"
+            notification.next_attempt_at = now + timedelta(seconds=self.lease_seconds)
+            claimed.append(notification)
+        # Изменения записываются при commit вызывающего кода
+        return [
+            notifications_schemas.Notification.model_validate(notification)
+            for notification in claimed
+        ]
+
+    def _drop(
+        self, notification: notifications_models.Notification, reason: str
+    ) -> None:
+        NOTIFICATIONS.labels("dead").inc()
+        logger.error("Notification %s is dead: %s", notification.id, reason)
+        notification.status = "dead"
+        notification.body = ""
+        notification.last_error = reason
+
+    async def _deliver_email(
+        self, notifications: List[notifications_schemas.Notification]
+    ) -> List[Optional[Exception]]:
+        messages = []
+        for notification in notifications:
+            msg = MIMEText(notification.body)
+            msg["Subject"] = notification.subject or ""
+            msg["From"] = settings.smtp.from_address
+            msg["To"] = notification.recipient
+            messages.append(msg)
+        async with self._email_semaphore:
+            return await EmailService.send_many(messages)
+
+    async def _deliver_sms(
+        self, notifications: List[notifications_schemas.Notification]
+    ) -> List[Optional[Exception]]:
+        results = await SMSService.send_many(
+            [
+                (notification.recipient, notification.body)
+                for notification in notifications
+            ]
+        )
+        return [
+            (
+                None
+                if result.success
+                else RuntimeError(result.error or "SMS delivery failed")
+            )
+            for result in results
+        ]
+
+    async def _deliver(
+        self, notifications: List[notifications_schemas.Notification]
+    ) -> List[Optional[Exception]]:
+        """
+        Доставляет пачку уведомлений, группируя их по каналам.
+
+        Возвращает:
+        - List[Optional[Exception]]: Ошибка для каждого уведомления в том же
+          порядке или None, если уведомление доставлено.
+        """
+        results: List[Optional[Exception]] = [None] * len(notifications)
+        channels: Dict[str, List[int]] = {}
+        for index, notification in enumerate(notifications):
+            channels.setdefault(notification.channel, []).append(index)
+
+        chunks = []
+        for channel, indexes in channels.items():
+            if channel == "email":
+                for offset in range(0, len(indexes), self.email_batch_size):
+                    chunks.append(
+                        (
+                            self._deliver_email,
+                            indexes[offset : offset + self.email_batch_size],
+                        )
+                    )
+            elif channel == "sms":
+                chunks.append((self._deliver_sms, indexes))
+            else:
+                for index in indexes:
+                    results[index] = ValueError(f"Unknown channel: {channel}")
+
+        chunk_results = await asyncio.gather(
+            *(
+                deliver([notifications[index] for index in indexes])
+                for deliver, indexes in chunks
+            ),
+            return_exceptions=True,
+        )
+        for (_, indexes), chunk_result in zip(chunks, chunk_results):
+            if isinstance(chunk_result, BaseException):
+                chunk_result = [chunk_result] * len(indexes)
+            for index, result in zip(indexes, chunk_result):
+                results[index] = result
+        return results
+
+    def _outcome(
+        self,
+        notification: notifications_schemas.Notification,
+        error: Optional[BaseException],
+    ) -> notifications_schemas.NotificationUpdateDB:
+        now = datetime.now()
+        if error is None:
+            NOTIFICATIONS.labels("sent").inc()
+            return notifications_schemas.NotificationUpdateDB(
+                status="sent", body="", sent_at=now, last_error=None
+            )
+
+        attempts = notification.attempts + 1
+        last_error = f"{type(error).__name__}: {error}"[:1024]
+        if attempts >= self.max_attempts:
+            NOTIFICATIONS.labels("dead").inc()
+            logger.error(
+                "Notification %s is dead after %s attempts: %s",
+                notification.id,
+                attempts,
+                last_error,
+            )
+            return notifications_schemas.NotificationUpdateDB(
+                status="dead", body="", attempts=attempts, last_error=last_error
+            )
+
+        delay = self.retry_backoff_seconds * 2 ** (attempts - 1)
+        next_attempt_at = now + timedelta(seconds=delay)
+        if (
+            notification.expires_at is not None
+            and next_attempt_at >= notification.expires_at
+        ):
+            # Повтор опоздает: например, OTP-код к этому времени уже истечет
+            NOTIFICATIONS.labels("dead").inc()
+            logger.error(
+                "Notification %s is dead: expires before the next attempt: %s",
+                notification.id,
+                last_error,
+            )
+            return notifications_schemas.NotificationUpdateDB(
+                status="dead", body="", attempts=attempts, last_error=last_error
+            )
+
+        NOTIFICATIONS.labels("retried").inc()
+        return notifications_schemas.NotificationUpdateDB(
+            status="pending",
+            attempts=attempts,
+            last_error=last_error,
+            next_attempt_at=next_attempt_at,
+        )
+
+    @staticmethod
+    def _request_span_context(
+        notification: notifications_schemas.Notification,
+    ) -> trace.SpanContext:
+        return trace.get_current_span(
+            context_from_traceparent(notification.trace_context)
+        ).get_span_context()
+
+    def _record_delivery_span(
+        self,
+        notification: notifications_schemas.Notification,
+        error: Optional[BaseException],
+        batch_span_context: trace.SpanContext,
+        started: int,
+        finished: int,
+    ) -> None:
+        # Уведомления пачки доставляются вместе, поэтому у всех span одно
+        # время доставки; время ожидания в очереди - отдельный атрибут
+        queue_wait = started / 1e9 - notification.created_at.timestamp()
+        span = tracer.start_span(
+            "notification.deliver",
+            context=context_from_traceparent(notification.trace_context),
+            links=[Link(batch_span_context)],
+            start_time=started,
+            attributes={
+                "notification.id": notification.id,
+                "notification.channel": notification.channel,
+                "notification.attempt": notification.attempts + 1,
+                "notification.queue_wait_seconds": queue_wait,
+                "notification.outcome": "sent" if error is None else "failed",
+            },
+        )
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(Status(StatusCode.ERROR))
+        span.end(end_time=finished)
+
+    async def dispatch_batch(self) -> int:
+        """
+        Забирает и доставляет одну пачку уведомлений.
+
+        Возвращает:
+        - int: Количество обработанных уведомлений.
+        """
+        started = time.monotonic()
+        async with async_session_maker() as session:
+            notifications = await self._claim(session, limit=self.batch_size)
+            await session.commit()
+        if not notifications:
+            return 0
+
+        if len(notifications) < self.batch_size and self.coalesce_window_seconds > 0:
+            await asyncio.sleep(self.coalesce_window_seconds)
+            async with async_session_maker() as session:
+                notifications += await self._claim(
+                    session, limit=self.batch_size - len(notifications)
+                )
+                await session.commit()
+
+        with tracer.start_as_current_span(
+            "NotificationDispatcher.dispatch_batch",
+            links=[
+                Link(self._request_span_context(notification))
+                for notification in notifications
+                if notification.trace_context
+            ],
+            attributes={"notification.batch_size": len(notifications)},
+        ) as batch_span:
+            delivery_started = time.time_ns()
+            results = await self._deliver(notifications)
+            delivery_finished = time.time_ns()
+
+            async with async_session_maker() as session:
+                for notification, result in zip(notifications, results):
+                    await notifications_dao.NotificationDao.update(
+                        session,
+                        notifications_models.Notification.id == notification.id,
+                        obj_in=self._outcome(notification, result),
+                    )
+                await session.commit()
+
+            for notification, result in zip(notifications, results):
+                self._record_delivery_span(
+                    notification,
+                    result,
+                    batch_span.get_span_context(),
+                    delivery_started,
+                    delivery_finished,
+                )
+
+        NOTIFICATION_BATCH_DURATION.observe(time.monotonic() - started)
+        return len(notifications)
+
+    async def run(self) -> None:
+        """
+        Обрабатывает очередь до вызова stop или получения SIGTERM/SIGINT.
+        Текущая пачка при остановке доводится до конца.
+        """
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, self.stop)
+
+        logger.info("Notification dispatcher started")
+        while not self._stopping.is_set():
+            try:
+                processed = await self.dispatch_batch()
+            except Exception:
+                NOTIFICATION_DISPATCH_ERRORS.inc()
+                logger.exception("Notification dispatch failed")
+                processed = 0
+            if processed < self.batch_size:
+                try:
+                    await asyncio.wait_for(
+                        self._stopping.wait(), timeout=self.poll_interval_seconds
+                    )
+                except asyncio.TimeoutError:
+                    pass
+        logger.info("Notification dispatcher stopped")
+
+    def stop(self) -> None:
+        self._stopping.set()
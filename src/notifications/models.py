@@ -0,0 +1,30 @@
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Index, String, Text
+
+
+from src.models import Base
+
+
+class Notification(Base):
+    __tablename__ = "notifications"
+    __table_args__ = (Index(None, "status", "next_attempt_at"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    # "email" или "sms"
+    channel: Mapped[str] = mapped_column(String(16), nullable=False)
+    recipient: Mapped[str] = mapped_column(String(255), nullable=False)
+    subject: Mapped[str] = mapped_column(String(255), nullable=True)
+    # Очищается после отправки или перевода в dead, чтобы коды не хранились
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    # "pending", "processing", "sent" или "dead"
+    status: Mapped[str] = mapped_column(String(16), nullable=False)
+    attempts: Mapped[int] = mapped_column(nullable=False, default=0)
+    last_error: Mapped[str] = mapped_column(String(1024), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(nullable=False)
+    sent_at: Mapped[datetime] = mapped_column(nullable=True)
+    # После этого времени уведомление не отправляется (например, истек OTP-код)
+    expires_at: Mapped[datetime] = mapped_column(nullable=True)
+    # traceparent запроса, поставившего уведомление в очередь (W3C Trace Context)
+    trace_context: Mapped[str] = mapped_column(String(64), nullable=True)
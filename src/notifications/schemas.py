@@ -0,0 +1,44 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Optional
+
+
+class NotificationCreateDB(BaseModel):
+    channel: str
+    recipient: str
+    subject: Optional[str] = None
+    body: str
+    status: str
+    attempts: int
+    created_at: datetime
+    next_attempt_at: datetime
+    expires_at: Optional[datetime] = None
+    trace_context: Optional[str] = None
+
+
+class NotificationUpdateDB(BaseModel):
+    body: Optional[str] = None
+    status: Optional[str] = None
+    attempts: Optional[int] = None
+    last_error: Optional[str] = None
+    next_attempt_at: Optional[datetime] = None
+    sent_at: Optional[datetime] = None
+
+
+class Notification(BaseModel):
+    id: int
+    channel: str
+    recipient: str
+    subject: Optional[str] = None
+    body: str
+    status: str
+    attempts: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    next_attempt_at: datetime
+    sent_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    trace_context: Optional[str] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,62 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+from src.notifications import dao as notifications_dao
+from src.notifications import schemas as notifications_schemas
+from src.monitoring.tracing import current_traceparent
+
+
+class NotificationService:
+    """
+    Очередь исходящих уведомлений (outbox).
+
+    Уведомление записывается в таблицу notifications в транзакции текущего
+    запроса и отправляется отдельным процессом диспетчера (python -m src.dispatcher),
+    поэтому API не обращается к SMTP и SMS-шлюзу. Вместе с уведомлением
+    сохраняется контекст трейса запроса, чтобы span доставки оказался
+    в том же трейсе.
+    """
+
+    @staticmethod
+    async def enqueue(
+        session: AsyncSession,
+        channel: str,
+        recipient: str,
+        body: str,
+        subject: Optional[str] = None,
+        expires_at: Optional[datetime] = None,
+    ) -> int:
+        """
+        Добавляет уведомление в очередь.
+
+        Параметры:
+        - session: AsyncSession - Сессия базы данных.
+        - channel: str - Канал доставки: "email" или "sms".
+        - recipient: str - Адрес или номер телефона получателя.
+        - body: str - Текст сообщения.
+        - subject: Optional[str] - Тема письма.
+        - expires_at: Optional[datetime] - Время, после которого уведомление
+          теряет смысл и не отправляется (например, истечение OTP-кода).
+
+        Возвращает:
+        - int: Идентификатор уведомления.
+        """
+        now = datetime.now()
+        notification_db = await notifications_dao.NotificationDao.add(
+            session,
+            notifications_schemas.NotificationCreateDB(
+                channel=channel,
+                recipient=recipient,
+                subject=subject,
+                body=body,
+                status="pending",
+                attempts=0,
+                created_at=now,
+                next_attempt_at=now,
+                expires_at=expires_at,
+                trace_context=current_traceparent(),
+            ),
+        )
+        return notification_db.id
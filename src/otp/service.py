@@ -2,34 +2,42 @@ import abc
 from datetime import datetime, timedelta
 import secrets
 import string
-from email.mime.text import MIMEText
 from fastapi import (
     HTTPException,
     status,
-    BackgroundTasks,
 )
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 from src.settings import settings
-from src.database import async_session_maker
-from src.auth import dao as auth_dao
 from src.auth import schemas as auth_schemas
-from src.auth.utils import get_hash, is_matched_hash
-from src.sms import service as sms_service
-from src.email.service import EmailService
+from src.otp.store import otp_store
+from src.otp.utils import get_otp_hash, is_matched_otp_hash
+from src.notifications.service import NotificationService
+
+
+def code_expiration() -> datetime:
+    """
+    Возвращает время истечения одноразового пароля, созданного сейчас.
+    """
+    return datetime.now() + timedelta(minutes=settings.otp.expire_minutes)
 
 
 class TempUserService:
     """
     Сервис для работы с временными пользователями.
+    Данные хранятся в otp_store (SQL, память процесса или Redis).
 
     Методы:
     - add_temp_user: Добавляет временного пользователя с одноразовым паролем и временем жизни.
     - get: Получает временного пользователя по его идентификатору.
+    - delete: Удаляет временного пользователя.
+    - delete_expired: Удаляет пачку просроченных временных пользователей.
     """
 
     @staticmethod
     async def add_temp_user(
+        session: AsyncSession,
         otp_code: str,
         user_data: auth_schemas.UserCreateDB,
     ) -> int:
@@ -37,35 +45,33 @@ class TempUserService:
         Добавляет временного пользователя с указанным одноразовым паролем.
 
         Параметры:
+        - session: AsyncSession - Сессия базы данных.
         - otp_code: str - Одноразовый пароль, который будет сохранен.
         - user_data: UserCreateDB - Данные пользователя для создания временного пользователя.
 
         Возвращает:
         - int: Идентификатор добавленного временного пользователя.
         """
-        async with async_session_maker() as session:
-            hashed_otp_code = get_hash(otp_code)
-            exp = datetime.now() + timedelta(minutes=settings.otp.expire_minutes)
-            temp_user_db = await auth_dao.TempUserDao.add(
-                session,
-                auth_schemas.TempUserCreateDB(
-                    **user_data.model_dump(),
-                    exp=exp,
-                    otp_code=hashed_otp_code,
-                ),
-            )
-            await session.commit()
-
-        return temp_user_db.id
+        exp = code_expiration()
+        return await otp_store.add(
+            session,
+            auth_schemas.TempUserCreateDB(
+                **user_data.model_dump(),
+                exp=exp,
+                otp_code=get_otp_hash(otp_code),
+            ),
+        )
 
     @staticmethod
     async def get(
+        session: AsyncSession,
         id: int,
     ):
         """
         Получает временного пользователя по его идентификатору.
 
         Параметры:
+        - session: AsyncSession - Сессия базы данных.
         - id: int - Идентификатор временного пользователя.
 
         Возвращает:
@@ -74,18 +80,52 @@ class TempUserService:
         Исключения:
         - HTTPException: Если временный пользователь не найден.
         """
-        async with async_session_maker() as session:
-            temp_user_db = await auth_dao.TempUserDao.find_one_or_none(
-                session,
-                id=id,
+        temp_user = await otp_store.get(session, id=id)
+
+        if temp_user is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Temp user not found"
             )
 
-            if temp_user_db is None:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND, detail="Temp user not found"
-                )
+        return temp_user
 
-        return auth_schemas.TempUser.model_validate(temp_user_db)
+    @staticmethod
+    async def delete(
+        session: AsyncSession,
+        id: int,
+    ) -> None:
+        """
+        Удаляет временного пользователя.
+
+        Параметры:
+        - session: AsyncSession - Сессия базы данных.
+        - id: int - Идентификатор временного пользователя.
+
+        Исключения:
+        - HTTPException: Если временный пользователь уже удален
+          (например, код подтвержден параллельным запросом).
+        """
+        if not await otp_store.delete(session, id=id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Temp user not found"
+            )
+
+    @staticmethod
+    async def delete_expired(
+        session: AsyncSession,
+        limit: int,
+    ) -> int:
+        """
+        Удаляет не более limit временных пользователей с истекшим сроком OTP.
+
+        Параметры:
+        - session: AsyncSession - Сессия базы данных.
+        - limit: int - Максимальное количество удаляемых записей.
+
+        Возвращает:
+        - int: Количество удаленных записей.
+        """
+        return await otp_store.delete_expired(session, limit=limit)
 
 
 class BaseOTPService(abc.ABC):
@@ -95,8 +135,8 @@ class BaseOTPService(abc.ABC):
     Методы:
     - _generate_code: Генерирует одноразовый пароль.
     - check_otp_code: Проверяет, соответствует ли код одноразового пароля.
-    - _send_code: Отправляет одноразовый пароль (метод должен быть переопределен в дочерних классах).
-    - send: Генерирует код и отправляет его пользователю.
+    - _send_code: Ставит одноразовый пароль в очередь уведомлений (метод должен быть переопределен в дочерних классах).
+    - send: Генерирует код и ставит его в очередь на отправку пользователю.
     """
 
     @classmethod
@@ -129,18 +169,20 @@ class BaseOTPService(abc.ABC):
         if temp_user_data.exp < datetime.now():
             return False
 
-        return is_matched_hash(word=code, hashed=temp_user_data.otp_code)
+        return is_matched_otp_hash(code=code, hashed=temp_user_data.otp_code)
 
     @classmethod
     async def _send_code(
         self,
+        session: AsyncSession,
         code: str,
         user_data: auth_schemas.UserCreateDB,
     ) -> None:
         """
-        Отправляет одноразовый пароль пользователю (метод должен быть переопределен в дочерних классах).
+        Ставит одноразовый пароль в очередь уведомлений (метод должен быть переопределен в дочерних классах).
 
         Параметры:
+        - session: AsyncSession - Сессия базы данных.
         - code: str - Код для отправки.
         - user_data: UserCreateDB - Данные пользователя для отправки.
         """
@@ -149,29 +191,31 @@ class BaseOTPService(abc.ABC):
     @classmethod
     async def send(
         self,
+        session: AsyncSession,
         user_data: auth_schemas.UserCreateDB,
-        background_tasks: BackgroundTasks,
     ) -> int:
         """
-        Генерирует одноразовый пароль и отправляет его пользователю.
+        Генерирует одноразовый пароль и ставит его в очередь на отправку пользователю.
+        Уведомление записывается в той же транзакции, что и временный пользователь,
+        и доставляется диспетчером (python -m src.dispatcher).
 
         Параметры:
+        - session: AsyncSession - Сессия базы данных.
         - user_data: UserCreateDB - Данные пользователя для отправки.
-        - background_tasks: BackgroundTasks - Задачи, которые будут выполнены в фоновом режиме.
 
         Возвращает:
         - int: Идентификатор временного пользователя.
         """
-        
         code = self._generate_code()
 
-        background_tasks.add_task(
-            self._send_code,
+        await self._send_code(
+            session=session,
             code=code,
             user_data=user_data,
         )
 
         temp_user_db_id = await TempUserService.add_temp_user(
+            session=session,
             otp_code=code,
             user_data=user_data,
         )
@@ -187,19 +231,24 @@ class TelephoneOTPService(BaseOTPService):
     @classmethod
     async def _send_code(
         self,
+        session: AsyncSession,
         code: str,
         user_data: auth_schemas.UserCreateDB,
     ) -> None:
         """
-        Отправляет одноразовый пароль пользователю по SMS.
+        Ставит в очередь SMS с одноразовым паролем.
 
         Параметры:
+        - session: AsyncSession - Сессия базы данных.
         - code: str - Код для отправки.
         - user_data: UserCreateDB - Данные пользователя для отправки.
         """
-        await sms_service.SMSService.send_sms(
-            msg=code,
-            telephone=user_data.telephone,
+        await NotificationService.enqueue(
+            session,
+            channel="sms",
+            recipient=user_data.telephone,
+            body=code,
+            expires_at=code_expiration(),
         )
 
 
@@ -211,19 +260,23 @@ class EmailOTPService(BaseOTPService):
     @classmethod
     async def _send_code(
         self,
+        session: AsyncSession,
         code: str,
         user_data: auth_schemas.UserCreateDB,
     ) -> None:
         """
-        Отправляет одноразовый пароль пользователю по Email.
+        Ставит в очередь письмо с одноразовым паролем.
 
         Параметры:
+        - session: AsyncSession - Сессия базы данных.
         - code: str - Код для отправки.
         - user_data: UserCreateDB - Данные пользователя для отправки.
         """
-        
-        msg = MIMEText(code)
-        msg["Subject"] = "Ваш одноразовый пароль"
-        msg["From"] = settings.smtp.from_address
-        msg["To"] = user_data.email
-        await EmailService.send(msg=msg, to_adres=user_data.email)
+        await NotificationService.enqueue(
+            session,
+            channel="email",
+            recipient=user_data.email,
+            subject="Ваш одноразовый пароль",
+            body=code,
+            expires_at=code_expiration(),
+        )
@@ -0,0 +1,214 @@
+import abc
+import heapq
+import itertools
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import redis.asyncio as redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+from src.settings import settings
+from src.auth import dao as auth_dao
+from src.auth import schemas as auth_schemas
+
+
+class OTPStore(abc.ABC):
+    """
+    Хранилище временных пользователей с OTP-кодами.
+
+    Все методы принимают сессию базы данных текущего запроса; хранилища,
+    которые не используют базу данных, ее игнорируют.
+
+    Методы:
+    - add: Сохраняет временного пользователя и возвращает его идентификатор.
+    - get: Возвращает временного пользователя или None.
+    - delete: Удаляет временного пользователя. Возвращает True, если он был.
+    - delete_expired: Удаляет пачку просроченных записей.
+    - close: Освобождает ресурсы хранилища.
+    """
+
+    @abc.abstractmethod
+    async def add(
+        self,
+        session: AsyncSession,
+        temp_user_data: auth_schemas.TempUserCreateDB,
+    ) -> int:
+        pass
+
+    @abc.abstractmethod
+    async def get(
+        self,
+        session: AsyncSession,
+        id: int,
+    ) -> Optional[auth_schemas.TempUser]:
+        pass
+
+    @abc.abstractmethod
+    async def delete(self, session: AsyncSession, id: int) -> bool:
+        pass
+
+    async def delete_expired(self, session: AsyncSession, limit: int) -> int:
+        return 0
+
+    async def close(self) -> None:
+        pass
+
+
+class SQLOTPStore(OTPStore):
+    """
+    Хранилище в таблице temp_users основной базы данных.
+    """
+
+    async def add(
+        self,
+        session: AsyncSession,
+        temp_user_data: auth_schemas.TempUserCreateDB,
+    ) -> int:
+        temp_user_db = await auth_dao.TempUserDao.add(session, temp_user_data)
+        return temp_user_db.id
+
+    async def get(
+        self,
+        session: AsyncSession,
+        id: int,
+    ) -> Optional[auth_schemas.TempUser]:
+        temp_user_db = await auth_dao.TempUserDao.find_one_or_none(session, id=id)
+        if temp_user_db is None:
+            return None
+        return auth_schemas.TempUser.model_validate(temp_user_db)
+
+    async def delete(self, session: AsyncSession, id: int) -> bool:
+        return await auth_dao.TempUserDao.delete(session, id=id) > 0
+
+    async def delete_expired(self, session: AsyncSession, limit: int) -> int:
+        model = auth_dao.TempUserDao.model
+        expired_ids = (
+            select(model.id).where(model.exp < datetime.now()).limit(limit)
+        )
+        return await auth_dao.TempUserDao.delete(session, model.id.in_(expired_ids))
+
+
+class MemoryOTPStore(OTPStore):
+    """
+    Хранилище в памяти процесса с истечением по TTL.
+
+    Подходит только для запуска в одном процессе: код, выданный одним
+    воркером gunicorn, не виден в другом.
+    """
+
+    def __init__(self) -> None:
+        self._items: Dict[int, Tuple[float, auth_schemas.TempUser]] = {}
+        self._expiry: List[Tuple[float, int]] = []
+        self._ids = itertools.count(1)
+
+    def _purge(self, limit: Optional[int] = None) -> int:
+        now = time.monotonic()
+        purged = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            if limit is not None and purged >= limit:
+                break
+            expires_at, id = heapq.heappop(self._expiry)
+            item = self._items.get(id)
+            if item is not None and item[0] == expires_at:
+                del self._items[id]
+                purged += 1
+        return purged
+
+    async def add(
+        self,
+        session: AsyncSession,
+        temp_user_data: auth_schemas.TempUserCreateDB,
+    ) -> int:
+        self._purge()
+        id = next(self._ids)
+        ttl = (temp_user_data.exp - datetime.now()).total_seconds()
+        expires_at = time.monotonic() + max(ttl, 0)
+        self._items[id] = (
+            expires_at,
+            auth_schemas.TempUser(id=id, **temp_user_data.model_dump()),
+        )
+        heapq.heappush(self._expiry, (expires_at, id))
+        return id
+
+    async def get(
+        self,
+        session: AsyncSession,
+        id: int,
+    ) -> Optional[auth_schemas.TempUser]:
+        item = self._items.get(id)
+        if item is None or item[0] <= time.monotonic():
+            return None
+        return item[1]
+
+    async def delete(self, session: AsyncSession, id: int) -> bool:
+        return self._items.pop(id, None) is not None
+
+    async def delete_expired(self, session: AsyncSession, limit: int) -> int:
+        return self._purge(limit=limit)
+
+
+class RedisOTPStore(OTPStore):
+    """
+    Хранилище в Redis (или любом сервере с протоколом Redis).
+    Истечение обеспечивается TTL ключей, идентификаторы выдает INCR.
+
+    Параметры:
+    - url: str - адрес сервера.
+    - prefix: str - префикс ключей.
+    """
+
+    def __init__(
+        self,
+        url: str = settings.redis.url,
+        prefix: str = "otp:temp_user",
+    ) -> None:
+        self._redis = redis.from_url(url)
+        self._prefix = prefix
+
+    def _key(self, id: int) -> str:
+        return f"{self._prefix}:{id}"
+
+    async def add(
+        self,
+        session: AsyncSession,
+        temp_user_data: auth_schemas.TempUserCreateDB,
+    ) -> int:
+        id = await self._redis.incr(f"{self._prefix}:id")
+        ttl = int((temp_user_data.exp - datetime.now()).total_seconds())
+        temp_user = auth_schemas.TempUser(id=id, **temp_user_data.model_dump())
+        await self._redis.set(
+            self._key(id), temp_user.model_dump_json(), ex=max(ttl, 1)
+        )
+        return id
+
+    async def get(
+        self,
+        session: AsyncSession,
+        id: int,
+    ) -> Optional[auth_schemas.TempUser]:
+        raw = await self._redis.get(self._key(id))
+        if raw is None:
+            return None
+        return auth_schemas.TempUser.model_validate_json(raw)
+
+    async def delete(self, session: AsyncSession, id: int) -> bool:
+        return await self._redis.delete(self._key(id)) > 0
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def create_otp_store(name: str = settings.otp.store) -> OTPStore:
+    stores = {
+        "sql": SQLOTPStore,
+        "memory": MemoryOTPStore,
+        "redis": RedisOTPStore,
+    }
+    if name not in stores:
+        raise ValueError(f"Unknown OTP store: {name}")
+    return stores[name]()
+
+
+otp_store = create_otp_store()
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+
+from src.settings import settings
+from src.database import async_session_maker
+from src.otp.service import TempUserService
+from src.monitoring.metrics import (
+    TEMP_USER_SWEEP_DURATION,
+    TEMP_USER_SWEEP_ERRORS,
+    TEMP_USERS_PURGED,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class TempUserSweeper:
+    """
+    Фоновая задача, удаляющая временных пользователей с истекшим OTP.
+
+    Каждые interval_seconds удаляет просроченные записи пачками по batch_size,
+    каждая пачка - в отдельной транзакции, чтобы не держать блокировку долго.
+    Запускается и останавливается в lifespan приложения. Каждый воркер gunicorn
+    запускает свой экземпляр; повторное удаление безопасно.
+
+    Параметры:
+    - interval_seconds: int - интервал между запусками.
+    - batch_size: int - размер пачки удаления.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: int = settings.temp_user_sweeper.interval_seconds,
+        batch_size: int = settings.temp_user_sweeper.batch_size,
+    ) -> None:
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def sweep(self) -> int:
+        """
+        Удаляет все просроченные записи пачками.
+
+        Возвращает:
+        - int: Количество удаленных записей.
+        """
+        started = time.monotonic()
+        purged = 0
+        while True:
+            async with async_session_maker() as session:
+                deleted = await TempUserService.delete_expired(
+                    session=session, limit=self.batch_size
+                )
+                await session.commit()
+            purged += deleted
+            TEMP_USERS_PURGED.inc(deleted)
+            if deleted < self.batch_size:
+                break
+            # Даем поработать обработчикам запросов между пачками
+            await asyncio.sleep(0)
+
+        elapsed = time.monotonic() - started
+        TEMP_USER_SWEEP_DURATION.observe(elapsed)
+        if purged:
+            logger.info("Purged %s expired temp users in %.3f s", purged, elapsed)
+        return purged
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                TEMP_USER_SWEEP_ERRORS.inc()
+                logger.exception("Temp user sweep failed")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="temp-user-sweeper")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+temp_user_sweeper = TempUserSweeper()
@@ -0,0 +1,26 @@
+import hashlib
+import hmac
+
+
+from src.settings import settings
+
+
+def _get_otp_hmac_key() -> bytes:
+    if settings.otp.hmac_secret:
+        return settings.otp.hmac_secret.encode()
+    # Ключ должен совпадать во всех воркерах, поэтому без явной настройки
+    # он выводится из закрытого ключа JWT, а не генерируется случайно
+    return hashlib.sha256(
+        b"otp-hmac:" + settings.auth_jwt.private_key_path.read_bytes()
+    ).digest()
+
+
+OTP_HMAC_KEY = _get_otp_hmac_key()
+
+
+def get_otp_hash(code: str) -> str:
+    return hmac.new(OTP_HMAC_KEY, code.encode(), hashlib.sha256).hexdigest()
+
+
+def is_matched_otp_hash(code: str, hashed: str) -> bool:
+    return hmac.compare_digest(get_otp_hash(code), hashed)
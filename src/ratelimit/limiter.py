@@ -0,0 +1,168 @@
+import abc
+import time
+from collections import OrderedDict
+from typing import List, Tuple
+import redis.asyncio as redis
+
+
+from src.settings import settings, RateLimitRule
+from src.monitoring.metrics import RATE_LIMIT_ALLOWED, RATE_LIMIT_KEYS, RATE_LIMITED
+
+
+class RateLimiter(abc.ABC):
+    """
+    Ограничитель частоты запросов по алгоритму корзины токенов.
+
+    Каждый ключ (IP, email/телефон, temp_user_id) - отдельная корзина
+    емкостью capacity, которая пополняется со скоростью capacity/period_seconds.
+    Запрос проверяет сразу несколько корзин и проходит, только если токен
+    есть во всех; токены списываются только у пропущенного запроса.
+
+    Методы:
+    - hit: Пытается списать по токену с каждой корзины. Возвращает 0, если
+      запрос разрешен, иначе количество секунд до появления токена.
+    - close: Освобождает ресурсы.
+    """
+
+    @abc.abstractmethod
+    async def _hit(self, checks: List[Tuple[str, RateLimitRule]]) -> float:
+        pass
+
+    async def hit(self, checks: List[Tuple[str, RateLimitRule]]) -> float:
+        retry_after = await self._hit(checks)
+        if retry_after > 0:
+            RATE_LIMITED.inc()
+        else:
+            RATE_LIMIT_ALLOWED.inc()
+        return retry_after
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryRateLimiter(RateLimiter):
+    """
+    Корзины в памяти процесса. Каждый воркер считает лимиты отдельно.
+
+    Ключи распределены по shards словарям, каждый из которых - LRU
+    на max_keys / shards ключей: память ограничена, а вытеснение и
+    перестроение словаря затрагивают только один небольшой шард.
+    Проверка не содержит await, поэтому атомарна в рамках event loop.
+
+    Параметры:
+    - shards: int - количество шардов.
+    - max_keys: int - максимальное количество корзин.
+    """
+
+    def __init__(
+        self,
+        shards: int = settings.rate_limit.memory_shards,
+        max_keys: int = settings.rate_limit.memory_max_keys,
+    ) -> None:
+        self._shards: List[OrderedDict] = [OrderedDict() for _ in range(shards)]
+        self._shard_max_keys = max(1, max_keys // shards)
+
+    def _shard(self, key: str) -> OrderedDict:
+        return self._shards[hash(key) % len(self._shards)]
+
+    async def _hit(self, checks: List[Tuple[str, RateLimitRule]]) -> float:
+        now = time.monotonic()
+        retry_after = 0.0
+        buckets = []
+        for key, rule in checks:
+            tokens, updated = self._shard(key).get(key, (rule.capacity, now))
+            tokens = min(rule.capacity, tokens + (now - updated) * rule.rate)
+            if tokens < 1:
+                retry_after = max(retry_after, (1 - tokens) / rule.rate)
+            buckets.append(tokens)
+
+        if retry_after > 0:
+            return retry_after
+
+        for (key, _), tokens in zip(checks, buckets):
+            shard = self._shard(key)
+            if key not in shard:
+                RATE_LIMIT_KEYS.inc()
+            shard[key] = (tokens - 1, now)
+            shard.move_to_end(key)
+            if len(shard) > self._shard_max_keys:
+                shard.popitem(last=False)
+                RATE_LIMIT_KEYS.dec()
+        return 0.0
+
+
+# Проверяет все корзины и списывает токены одной атомарной операцией.
+# KEYS - корзины, ARGV - пары (capacity, rate) для каждой корзины.
+# Время берется с сервера, чтобы воркеры на разных машинах считали одинаково.
+_TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local buckets = {}
+local retry_after = 0
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', KEYS[i], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    if tokens < 1 then
+        retry_after = math.max(retry_after, (1 - tokens) / rate)
+    end
+    buckets[i] = tokens
+end
+if retry_after > 0 then
+    return tostring(retry_after)
+end
+for i = 1, #KEYS do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    redis.call('HSET', KEYS[i], 'tokens', tostring(buckets[i] - 1), 'updated', tostring(now))
+    redis.call('EXPIRE', KEYS[i], math.ceil(capacity / rate) + 1)
+end
+return '0'
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """
+    Корзины в Redis (или любом сервере с протоколом Redis), общие для всех
+    воркеров и машин. Проверка выполняется Lua-скриптом за один запрос,
+    корзина удаляется по TTL, когда полностью пополнится.
+
+    Параметры:
+    - url: str - адрес сервера.
+    - prefix: str - префикс ключей.
+    """
+
+    def __init__(
+        self,
+        url: str = settings.redis.url,
+        prefix: str = "ratelimit",
+    ) -> None:
+        self._redis = redis.from_url(url)
+        self._prefix = prefix
+        self._script = self._redis.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    async def _hit(self, checks: List[Tuple[str, RateLimitRule]]) -> float:
+        keys = [f"{self._prefix}:{key}" for key, _ in checks]
+        args = []
+        for _, rule in checks:
+            args.extend((rule.capacity, rule.rate))
+        return float(await self._script(keys=keys, args=args))
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def create_rate_limiter(name: str = settings.rate_limit.backend) -> RateLimiter:
+    limiters = {
+        "memory": MemoryRateLimiter,
+        "redis": RedisRateLimiter,
+    }
+    if name not in limiters:
+        raise ValueError(f"Unknown rate limiter backend: {name}")
+    return limiters[name]()
+
+
+rate_limiter = create_rate_limiter()
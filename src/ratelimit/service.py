@@ -0,0 +1,162 @@
+import ipaddress
+from typing import List, Tuple
+from fastapi import Request
+
+
+from src.settings import settings, RateLimitRule
+from src.exceptions import TooManyRequestsException
+from src.ratelimit.limiter import rate_limiter
+from src.auth import schemas as auth_schemas
+
+
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(proxy) for proxy in settings.rate_limit.trusted_proxies
+]
+
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+
+class RateLimitService:
+    """
+    Ограничение частоты запросов к эндпоинтам аутентификации.
+
+    Проверки вызываются в роутерах до обращения к сервисам, поэтому
+    отклоненный запрос не выполняет ни хеширование пароля, ни запросы к базе.
+    Исключение - лимит попыток ввода OTP для временного пользователя: ключ
+    включает время жизни его кода, поэтому проверка выполняется после чтения
+    временного пользователя, но до сравнения кода.
+
+    IP клиента берется из X-Forwarded-For, только если запрос пришел
+    от доверенного прокси (RateLimitSettings.trusted_proxies).
+
+    Методы:
+    - check_login: Ограничивает попытки входа по IP и по email/телефону.
+    - check_register: Ограничивает регистрации по IP и по email/телефону.
+    - check_otp: Ограничивает попытки ввода OTP по IP.
+    - check_otp_attempts: Ограничивает попытки ввода OTP для временного пользователя.
+    """
+
+    @staticmethod
+    def _client_ip(request: Request) -> str:
+        if request.client is None:
+            return "unknown"
+        address = request.client.host
+        if not _is_trusted_proxy(address):
+            return address
+        # Каждый прокси дописывает адрес, от которого получил запрос, в конец
+        # заголовка. Идем справа налево, пропуская доверенные прокси; левее
+        # первого недоверенного адреса значения мог подставить сам клиент
+        forwarded = [
+            value.strip()
+            for header in request.headers.getlist("x-forwarded-for")
+            for value in header.split(",")
+            if value.strip()
+        ]
+        for address in reversed(forwarded):
+            if not _is_trusted_proxy(address):
+                return address
+        return address
+
+    @staticmethod
+    async def _check(checks: List[Tuple[str, RateLimitRule]]) -> None:
+        """
+        Исключения:
+        - TooManyRequestsException: Если лимит хотя бы одной корзины исчерпан.
+        """
+        if not settings.rate_limit.enabled:
+            return
+        retry_after = await rate_limiter.hit(checks)
+        if retry_after > 0:
+            raise TooManyRequestsException(retry_after=retry_after)
+
+    @classmethod
+    async def check_login(cls, request: Request, identifier: str) -> None:
+        """
+        Проверяет лимит попыток входа.
+
+        Параметры:
+        - request: Request - Текущий запрос.
+        - identifier: str - Email или номер телефона из запроса.
+
+        Исключения:
+        - TooManyRequestsException: Если лимит исчерпан.
+        """
+        await cls._check(
+            [
+                (f"login:ip:{cls._client_ip(request)}", settings.rate_limit.login_ip),
+                (
+                    f"login:identifier:{identifier.lower()}",
+                    settings.rate_limit.login_identifier,
+                ),
+            ]
+        )
+
+    @classmethod
+    async def check_register(cls, request: Request, identifier: str) -> None:
+        """
+        Проверяет лимит регистраций. Лимит по email/телефону также защищает
+        получателя от рассылки кодов на его адрес.
+
+        Параметры:
+        - request: Request - Текущий запрос.
+        - identifier: str - Email или номер телефона из запроса.
+
+        Исключения:
+        - TooManyRequestsException: Если лимит исчерпан.
+        """
+        await cls._check(
+            [
+                (
+                    f"register:ip:{cls._client_ip(request)}",
+                    settings.rate_limit.register_ip,
+                ),
+                (
+                    f"register:identifier:{identifier.lower()}",
+                    settings.rate_limit.register_identifier,
+                ),
+            ]
+        )
+
+    @classmethod
+    async def check_otp(cls, request: Request) -> None:
+        """
+        Проверяет лимит попыток ввода OTP-кода с одного IP.
+
+        Параметры:
+        - request: Request - Текущий запрос.
+
+        Исключения:
+        - TooManyRequestsException: Если лимит исчерпан.
+        """
+        await cls._check(
+            [(f"otp:ip:{cls._client_ip(request)}", settings.rate_limit.otp_ip)]
+        )
+
+    @classmethod
+    async def check_otp_attempts(cls, temp_user: auth_schemas.TempUser) -> None:
+        """
+        Проверяет лимит попыток ввода OTP-кода для временного пользователя.
+        Идентификаторы временных пользователей могут использоваться повторно
+        (SQLite переиспользует rowid удаленных строк), поэтому в ключ входит
+        время истечения кода: у новой регистрации будет новая корзина.
+
+        Параметры:
+        - temp_user: TempUser - Временный пользователь.
+
+        Исключения:
+        - TooManyRequestsException: Если лимит исчерпан.
+        """
+        await cls._check(
+            [
+                (
+                    f"otp:temp_user:{temp_user.id}:{temp_user.exp.timestamp()}",
+                    settings.rate_limit.otp_temp_user,
+                )
+            ]
+        )
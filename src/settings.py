@@ -1,6 +1,8 @@
+import ipaddress
 import os
 from pathlib import Path
-from pydantic import BaseModel, EmailStr
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, field_validator
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -29,9 +31,16 @@ class TelegramBotSettings(BaseModel):
 class SMSSettings(BaseModel):
     email: EmailStr = os.getenv("SMSAERO_EMAIL")
     api_key: str = os.getenv("SMSAERO_API_KEY")
-    gate_url: str = "gate.smsaero.ru/v2/"
+    gate_url: str = "https://gate.smsaero.ru/v2/"
     signature: str = "SMS Aero"
     timeout: int = 10
+    # Одновременных запросов к шлюзу (и keep-alive соединений)
+    max_concurrency: int = 10
+    # Повторы при 5xx и таймаутах, задержка растет как backoff_seconds * 2^n
+    max_retries: int = 3
+    backoff_seconds: float = 0.5
+    # Номеров в одном запросе при отправке одинакового текста
+    bulk_size: int = 50
 
 
 class SMTPSettings(BaseModel):
@@ -39,23 +48,215 @@ class SMTPSettings(BaseModel):
     from_address_password: str = os.getenv("EMAIL_PASSWORD")
     port: int = 587
     server: str = "smtp.yandex.ru"
+    start_tls: bool = True
+    timeout: int = 10
+    # Сколько авторизованных соединений держится открытыми одновременно
+    pool_size: int = 4
+    # Соединение, простаивавшее дольше, переоткрывается перед отправкой
+    idle_timeout: int = 60
 
 
 class DbSettings(BaseModel):
-    url: str = f"sqlite+aiosqlite:///{DB_PATH}"
-    echo: bool = True
+    model_config = ConfigDict(validate_default=True)
+
+    # sqlite:///... или postgresql://... (асинхронный драйвер подставляется сам)
+    url: str = os.getenv("DATABASE_URL") or f"sqlite+aiosqlite:///{DB_PATH}"
+    echo: bool = False
+
+    # Пул соединений (PostgreSQL)
+    pool_size: int = 10
+    max_overflow: int = 10
+    pool_timeout: int = 30
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+
+    # Встроенная SQLite
+    sqlite_wal: bool = True
+    sqlite_busy_timeout_ms: int = 5000
+
+    # Реплики только для чтения, через запятую в DATABASE_REPLICA_URLS
+    replica_urls: List[str] = [
+        url for url in (os.getenv("DATABASE_REPLICA_URLS") or "").split(",") if url
+    ]
+    # Реплика, на которой запрос упал с ошибкой соединения, не используется,
+    # пока ее не вернет проверка, выполняемая раз в replica_health_check_seconds
+    replica_health_check_seconds: float = 10.0
+    # Сколько секунд после изменения данных пользователя (привязка Telegram)
+    # его профиль читается из primary; должно быть больше задержки репликации
+    read_your_writes_seconds: float = 5.0
+
+    @staticmethod
+    def _async_driver_url(v: str) -> str:
+        if v.startswith("sqlite://"):
+            return "sqlite+aiosqlite://" + v.removeprefix("sqlite://")
+        for prefix in ("postgresql://", "postgres://"):
+            if v.startswith(prefix):
+                return "postgresql+asyncpg://" + v.removeprefix(prefix)
+        return v
+
+    @field_validator("url")
+    @classmethod
+    def use_async_driver(cls, v: str) -> str:
+        return cls._async_driver_url(v)
+
+    @field_validator("replica_urls")
+    @classmethod
+    def use_async_driver_for_replicas(cls, v: List[str]) -> List[str]:
+        return [cls._async_driver_url(url.strip()) for url in v]
+
+
+class JWTKeySettings(BaseModel):
+    kid: str
+    # RS256, ES256, EdDSA или HS256
+    algorithm: str
+    # Для ключей, которые только проверяют токены, private_key_path не нужен
+    private_key_path: Optional[Path] = None
+    public_key_path: Optional[Path] = None
+    # Только для HS256
+    secret: Optional[str] = None
 
 
 class AuthJWT(BaseModel):
+    # Основной ключ
+    kid: str = "default"
     private_key_path: Path = BASE_DIR / "certs" / "jwt-private.pem"
     public_key_path: Path = BASE_DIR / "certs" / "jwt-public.pem"
     algorithm: str = "RS256"
+    # Дополнительные ключи для ротации: токен проверяется ключом по kid
+    # из заголовка, пока ключ есть в этом списке
+    extra_keys: List[JWTKeySettings] = []
+    # Ключ, которым подписываются новые токены
+    signing_kid: str = "default"
+    # Ключ для проверки токенов без kid, выпущенных до появления ротации
+    legacy_kid: str = "default"
     access_token_expire_minutes: int = 15
+    # Допустимое расхождение часов при проверке exp и iat
+    leeway_seconds: int = 0
+
+
+class TokenCacheSettings(BaseModel):
+    enabled: bool = True
+    max_size: int = 10_000
+    # Запись живет до exp токена, но не дольше ttl_seconds: кэш локален для
+    # процесса, и изменения пользователя в другом воркере gunicorn он не увидит
+    ttl_seconds: int = 60
+
+
+class HashingPoolSettings(BaseModel):
+    # "thread" или "process"
+    executor: str = "thread"
+    max_workers: int = os.cpu_count() or 1
+    # Сколько задач может ожидать свободного воркера сверх max_workers,
+    # после чего запросы отклоняются с 503
+    max_queue_size: int = 64
+
+
+class RedisSettings(BaseModel):
+    url: str = os.getenv("REDIS_URL") or "redis://localhost:6379/0"
 
 
 class OTP(BaseModel):
     length: int = 6
     expire_minutes: int = 1
+    # Где хранятся коды: "sql" (таблица temp_users), "memory" (только для
+    # одного процесса) или "redis"
+    store: str = os.getenv("OTP_STORE") or "sql"
+    # Ключ HMAC для кодов. Если не задан, выводится из закрытого ключа JWT
+    hmac_secret: Optional[str] = os.getenv("OTP_HMAC_SECRET") or None
+
+
+class RateLimitRule(BaseModel):
+    # Корзина токенов: не более capacity запросов подряд, затем
+    # capacity запросов за period_seconds
+    capacity: int
+    period_seconds: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period_seconds
+
+
+class RateLimitSettings(BaseModel):
+    model_config = ConfigDict(validate_default=True)
+
+    enabled: bool = True
+    # "memory" (отдельно в каждом процессе) или "redis" (общий для всех воркеров)
+    backend: str = os.getenv("RATE_LIMIT_BACKEND") or "memory"
+    memory_shards: int = 16
+    memory_max_keys: int = 100_000
+    # Адреса и подсети (через запятую) обратных прокси, например ngrok
+    # или балансировщика. Только для запросов от них IP клиента берется
+    # из X-Forwarded-For, иначе заголовок можно подделать
+    trusted_proxies: List[str] = [
+        proxy
+        for proxy in (os.getenv("RATE_LIMIT_TRUSTED_PROXIES") or "").split(",")
+        if proxy
+    ]
+    login_ip: RateLimitRule = RateLimitRule(capacity=20, period_seconds=60)
+    login_identifier: RateLimitRule = RateLimitRule(capacity=5, period_seconds=300)
+    register_ip: RateLimitRule = RateLimitRule(capacity=10, period_seconds=60)
+    register_identifier: RateLimitRule = RateLimitRule(capacity=3, period_seconds=600)
+    otp_ip: RateLimitRule = RateLimitRule(capacity=30, period_seconds=60)
+    # За время жизни кода перебрать 10^6 вариантов по 5 попыток невозможно
+    otp_temp_user: RateLimitRule = RateLimitRule(capacity=5, period_seconds=300)
+
+    @field_validator("trusted_proxies")
+    @classmethod
+    def parse_trusted_proxies(cls, v: List[str]) -> List[str]:
+        # Ошибка в адресе обнаруживается при старте, а не на первом запросе
+        return [str(ipaddress.ip_network(proxy.strip(), strict=False)) for proxy in v]
+
+
+class MetricsSettings(BaseModel):
+    # Эндпоинт /metrics и middleware с метриками запросов
+    enabled: bool = True
+    # Порт, на котором диспетчер уведомлений отдает метрики (0 - не отдавать)
+    dispatcher_port: int = int(os.getenv("DISPATCHER_METRICS_PORT") or 9101)
+
+
+class TracingSettings(BaseModel):
+    # "none", "otlp" (коллектор OpenTelemetry по HTTP) или "file"
+    exporter: str = os.getenv("TRACING_EXPORTER") or "none"
+    otlp_endpoint: str = (
+        os.getenv("OTEL_EXPORTER_OTLP_TRACES_ENDPOINT")
+        or "http://localhost:4318/v1/traces"
+    )
+    file_path: str = os.getenv("TRACING_FILE") or "traces.jsonl"
+    service_name: str = "authentication-backend"
+
+
+class ProfilingSettings(BaseModel):
+    # Эндпоинт /debug/profile подключается, только если задан токен,
+    # который передается в заголовке X-Profiling-Token
+    token: str = os.getenv("PROFILING_TOKEN") or ""
+    max_seconds: float = 60.0
+    interval_seconds: float = 0.005
+
+
+class TempUserSweeperSettings(BaseModel):
+    enabled: bool = True
+    interval_seconds: int = 60
+    # Сколько просроченных записей удаляется за одну транзакцию
+    batch_size: int = 1000
+
+
+class NotificationDispatcherSettings(BaseModel):
+    # Сколько уведомлений забирается из очереди за один проход
+    batch_size: int = 100
+    poll_interval_seconds: float = 1.0
+    # Если пачка неполная, диспетчер ждет столько секунд и добирает ее,
+    # чтобы отправить уведомления одной пачкой
+    coalesce_window_seconds: float = 0.05
+    # После max_attempts неудачных попыток уведомление переводится в dead
+    max_attempts: int = 5
+    retry_backoff_seconds: float = 5.0
+    # Через сколько секунд уведомление, взятое упавшим диспетчером,
+    # снова становится доступным
+    lease_seconds: int = 60
+    # Писем, отправляемых через одно SMTP-соединение, и одновременных соединений;
+    # одновременность SMS ограничивается настройкой sms.max_concurrency
+    email_batch_size: int = 20
+    email_concurrency: int = 4
 
 
 class Settings(BaseSettings):
@@ -67,12 +268,32 @@ class Settings(BaseSettings):
 
     otp: OTP = OTP()
 
+    redis: RedisSettings = RedisSettings()
+
+    rate_limit: RateLimitSettings = RateLimitSettings()
+
+    temp_user_sweeper: TempUserSweeperSettings = TempUserSweeperSettings()
+
     smtp: SMTPSettings = SMTPSettings()
 
     sms: SMSSettings = SMSSettings()
 
+    notification_dispatcher: NotificationDispatcherSettings = (
+        NotificationDispatcherSettings()
+    )
+
     auth_jwt: AuthJWT = AuthJWT()
 
+    hashing_pool: HashingPoolSettings = HashingPoolSettings()
+
+    token_cache: TokenCacheSettings = TokenCacheSettings()
+
+    metrics: MetricsSettings = MetricsSettings()
+
+    tracing: TracingSettings = TracingSettings()
+
+    profiling: ProfilingSettings = ProfilingSettings()
+
     telegram_bot: TelegramBotSettings = TelegramBotSettings()
 
     telegram_auth_widget: TelegramAuthWidgetSettings = TelegramAuthWidgetSettings()
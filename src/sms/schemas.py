@@ -0,0 +1,10 @@
+from typing import Optional
+from pydantic import BaseModel
+
+
+class SMSResult(BaseModel):
+    success: bool
+    message_id: Optional[int] = None
+    status: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 1
@@ -1,8 +1,283 @@
-from urllib.parse import urlencode
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
 import aiohttp
 
 
 from src.settings import settings
+from src.monitoring.metrics import (
+    POOL_WAIT,
+    SMS,
+    SMS_GATEWAY_REQUESTS,
+    SMS_GATEWAY_RETRIES,
+    STAGE_DURATION,
+)
+from src.monitoring.tracing import traced
+from src.sms.schemas import SMSResult
+
+
+logger = logging.getLogger(__name__)
+
+
+class SMSGatewayClient:
+    """
+    Клиент SMS-шлюза с одной HTTP-сессией на все время работы приложения.
+
+    Соединения с шлюзом переиспользуются (keep-alive), количество одновременных
+    запросов ограничено, при 5xx и таймаутах запрос повторяется с
+    экспоненциальной задержкой. Учетные данные передаются в заголовке
+    Authorization, а не в URL.
+
+    Параметры:
+    - gate_url: str - адрес API шлюза.
+    - email: str - логин.
+    - api_key: str - ключ API.
+    - signature: str - подпись отправителя.
+    - timeout: int - таймаут одного запроса в секундах.
+    - max_concurrency: int - максимальное количество одновременных запросов.
+    - max_retries: int - количество повторов.
+    - backoff_seconds: float - начальная задержка между повторами.
+    - bulk_size: int - максимальное количество номеров в одном запросе send_bulk.
+    """
+
+    def __init__(
+        self,
+        gate_url: str = settings.sms.gate_url,
+        email: str = settings.sms.email,
+        api_key: str = settings.sms.api_key,
+        signature: str = settings.sms.signature,
+        timeout: int = settings.sms.timeout,
+        max_concurrency: int = settings.sms.max_concurrency,
+        max_retries: int = settings.sms.max_retries,
+        backoff_seconds: float = settings.sms.backoff_seconds,
+        bulk_size: int = settings.sms.bulk_size,
+    ) -> None:
+        if "://" not in gate_url:
+            gate_url = f"https://{gate_url}"
+        self.gate_url = gate_url.rstrip("/") + "/"
+        self.email = email
+        self.api_key = api_key
+        self.signature = signature
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.bulk_size = bulk_size
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Сессия создается внутри работающего event loop при первой отправке
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_concurrency,
+                    keepalive_timeout=60,
+                ),
+                auth=aiohttp.BasicAuth(self.email or "", self.api_key or ""),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    @staticmethod
+    def _parse(content: Any) -> SMSResult:
+        if not isinstance(content, dict):
+            return SMSResult(success=False, error="Unexpected gateway response")
+
+        data = content.get("data")
+        if not content.get("success") or not isinstance(data, dict):
+            return SMSResult(
+                success=False,
+                error=content.get("message") or "Gateway rejected the message",
+            )
+
+        return SMSResult(
+            success=True,
+            message_id=data.get("id"),
+            status=data.get("extendStatus"),
+        )
+
+    @classmethod
+    def _parse_bulk(cls, content: Any, telephones: List[str]) -> List[SMSResult]:
+        if not isinstance(content, dict):
+            error = "Unexpected gateway response"
+            return [SMSResult(success=False, error=error) for _ in telephones]
+
+        data = content.get("data")
+        if not content.get("success") or not isinstance(data, list):
+            error = content.get("message") or "Gateway rejected the message"
+            return [SMSResult(success=False, error=error) for _ in telephones]
+
+        by_number = {
+            str(item.get("number")): item for item in data if isinstance(item, dict)
+        }
+        results = []
+        for telephone in telephones:
+            item = by_number.get(telephone)
+            if item is None:
+                results.append(
+                    SMSResult(success=False, error="No status for the number")
+                )
+            else:
+                results.append(
+                    SMSResult(
+                        success=True,
+                        message_id=item.get("id"),
+                        status=item.get("extendStatus"),
+                    )
+                )
+        return results
+
+    async def _request(self, payload: Dict[str, Any]) -> Optional[Tuple[int, Any]]:
+        """
+        Выполняет один запрос к шлюзу.
+        Возвращает HTTP-статус и тело ответа или None, если запрос стоит повторить.
+        """
+        waiting_since = time.monotonic()
+        async with self._semaphore:
+            POOL_WAIT.labels("sms").observe(time.monotonic() - waiting_since)
+            async with self._get_session().post(
+                f"{self.gate_url}sms/send", json=payload
+            ) as response:
+                if response.status >= 500:
+                    return None
+                try:
+                    content = await response.json(content_type=None)
+                except ValueError:
+                    content = None
+                return response.status, content
+
+    async def _post(
+        self, payload: Dict[str, Any]
+    ) -> Tuple[Optional[Tuple[int, Any]], Optional[str], int]:
+        """
+        Выполняет запрос к шлюзу с повторами при 5xx и ошибках сети.
+        Возвращает ответ (или None), последнюю ошибку и количество попыток.
+        """
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                SMS_GATEWAY_RETRIES.inc()
+                await asyncio.sleep(self.backoff_seconds * 2 ** (attempt - 1))
+            try:
+                response = await self._request(payload)
+            except (asyncio.TimeoutError, aiohttp.ClientError) as ex:
+                error = f"{type(ex).__name__}: {ex}"
+                continue
+            if response is not None:
+                return response, None, attempt + 1
+            error = "Gateway server error"
+        return None, error, self.max_retries + 1
+
+    @staticmethod
+    def _record(results: List[SMSResult], started: float) -> None:
+        STAGE_DURATION.labels("sms_send").observe(time.monotonic() - started)
+        sent = sum(result.success for result in results)
+        SMS.labels("sent").inc(sent)
+        SMS.labels("failed").inc(len(results) - sent)
+
+    async def send(self, telephone: str, msg: str) -> SMSResult:
+        """
+        Отправляет SMS-сообщение.
+
+        Параметры:
+        - telephone: str - номер телефона получателя.
+        - msg: str - текст сообщения.
+
+        Возвращает:
+        - SMSResult: Результат отправки. Ошибки сети и шлюза не поднимаются,
+          а возвращаются как success=False.
+        """
+        started = time.monotonic()
+        SMS_GATEWAY_REQUESTS.labels("single").inc()
+        response, error, attempts = await self._post(
+            {"number": telephone, "text": msg, "sign": self.signature}
+        )
+        if response is None:
+            result = SMSResult(success=False, error=error)
+        else:
+            status, content = response
+            result = self._parse(content)
+            if not result.success and result.error is None:
+                result.error = f"HTTP {status}"
+        result.attempts = attempts
+
+        self._record([result], started)
+        return result
+
+    async def send_bulk(self, telephones: List[str], msg: str) -> List[SMSResult]:
+        """
+        Отправляет одинаковый текст на несколько номеров одним запросом
+        (параметр numbers метода sms/send).
+
+        Параметры:
+        - telephones: List[str] - номера телефонов получателей.
+        - msg: str - текст сообщения.
+
+        Возвращает:
+        - List[SMSResult]: Результат для каждого номера в том же порядке.
+        """
+        started = time.monotonic()
+        SMS_GATEWAY_REQUESTS.labels("bulk").inc()
+        response, error, attempts = await self._post(
+            {"numbers": telephones, "text": msg, "sign": self.signature}
+        )
+        if response is None:
+            results = [SMSResult(success=False, error=error) for _ in telephones]
+        else:
+            results = self._parse_bulk(response[1], telephones)
+        for result in results:
+            result.attempts = attempts
+
+        self._record(results, started)
+        return results
+
+    async def send_many(self, messages: List[Tuple[str, str]]) -> List[SMSResult]:
+        """
+        Отправляет пачку SMS. Сообщения с одинаковым текстом объединяются
+        в запросы send_bulk по bulk_size номеров, остальные отправляются
+        отдельными запросами; запросы выполняются параллельно в пределах
+        max_concurrency.
+
+        Параметры:
+        - messages: List[Tuple[str, str]] - пары (номер телефона, текст).
+
+        Возвращает:
+        - List[SMSResult]: Результат для каждого сообщения в том же порядке.
+        """
+        groups: Dict[str, List[int]] = {}
+        for index, (_, msg) in enumerate(messages):
+            groups.setdefault(msg, []).append(index)
+
+        results: List[Optional[SMSResult]] = [None] * len(messages)
+
+        async def send_group(msg: str, indexes: List[int]) -> None:
+            if len(indexes) == 1:
+                results[indexes[0]] = await self.send(messages[indexes[0]][0], msg)
+                return
+            group_results = await self.send_bulk(
+                [messages[index][0] for index in indexes], msg
+            )
+            for index, result in zip(indexes, group_results):
+                results[index] = result
+
+        await asyncio.gather(
+            *(
+                send_group(msg, indexes[offset : offset + self.bulk_size])
+                for msg, indexes in groups.items()
+                for offset in range(0, len(indexes), self.bulk_size)
+            )
+        )
+        return results
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+sms_client = SMSGatewayClient()
 
 
 class SMSService:
@@ -10,11 +285,14 @@ class SMSService:
     Класс для отправки SMS-сообщений через SMS-шлюз.
 
     Методы:
-        send_sms(telephone: str, msg: str) -> None
+        send_sms(telephone: str, msg: str) -> SMSResult
             Асинхронно отправляет SMS-сообщение на указанный номер телефона с заданным текстом.
+        send_many(messages: List[Tuple[str, str]]) -> List[SMSResult]
+            Асинхронно отправляет пачку SMS-сообщений.
     """
     @staticmethod
-    async def send_sms(telephone: str, msg: str) -> None:
+    @traced()
+    async def send_sms(telephone: str, msg: str) -> SMSResult:
         """
         Отправляет SMS-сообщение через указанный SMS-шлюз.
 
@@ -22,21 +300,37 @@ class SMSService:
         - telephone (str): Номер телефона получателя сообщения.
         - msg (str): Текст сообщения.
 
-        Использует параметры конфигурации из settings для построения запроса к SMS API.
-        Формирует URL с учётом телефона, текста сообщения и подписи, а также применяет
-        настройки времени ожидания.
+        Запрос выполняется через общий клиент sms_client с повторами при
+        ошибках сервера и таймаутах.
 
-        Исключения:
-        - Поднимает исключение, если запрос не был успешен или не удалось обработать ответ.
+        Возвращает:
+        - SMSResult: Результат отправки.
         """
-        url = f"https://{settings.sms.email}:{settings.sms.api_key}@{settings.sms.gate_url}sms/send"
+        result = await sms_client.send(telephone=telephone, msg=msg)
+        if not result.success:
+            logger.warning(
+                "SMS delivery failed after %s attempts: %s",
+                result.attempts,
+                result.error,
+            )
+        return result
 
-        params = {
-            "number": telephone,
-            "text": msg,
-            "sign": settings.sms.signature,
-        }
-        full_url = f"{url}?{urlencode(params)}"
-        async with aiohttp.ClientSession() as session:
-            async with session.get(full_url, timeout=settings.sms.timeout) as response:
-                content = await response.json()
+    @staticmethod
+    @traced()
+    async def send_many(messages: List[Tuple[str, str]]) -> List[SMSResult]:
+        """
+        Отправляет пачку SMS-сообщений через общий клиент sms_client.
+
+        Параметры:
+        - messages (List[Tuple[str, str]]): Пары (номер телефона, текст).
+
+        Возвращает:
+        - List[SMSResult]: Результат для каждого сообщения в том же порядке.
+        """
+        results = await sms_client.send_many(messages)
+        failed = sum(not result.success for result in results)
+        if failed:
+            logger.warning(
+                "SMS delivery failed for %s of %s messages", failed, len(results)
+            )
+        return results
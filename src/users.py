@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import logging
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, TextIO
+
+
+from src.settings import settings
+from src.database import engine
+from src.auth.utils import HashingPool
+from src.auth.services.transfer import UserImporter, export_users, read_records
+
+
+def _format(path: str, format: Optional[str]) -> str:
+    if format:
+        return format
+    return "csv" if Path(path).suffix == ".csv" else "jsonl"
+
+
+@contextmanager
+def _open(path: str, mode: str) -> Iterator[TextIO]:
+    if path == "-":
+        yield sys.stdin if mode == "r" else sys.stdout
+        return
+    with open(path, mode, newline="", encoding="utf-8") as file:
+        yield file
+
+
+async def import_command(args: argparse.Namespace) -> None:
+    hashing_pool = HashingPool(
+        executor=args.executor,
+        max_workers=args.workers,
+        max_queue_size=args.chunk_size,
+    )
+    importer = UserImporter(
+        chunk_size=args.chunk_size,
+        on_conflict=args.on_conflict,
+        hashing_pool=hashing_pool,
+    )
+    try:
+        with _open(args.file, "r") as file:
+            await importer.run(read_records(file, _format(args.file, args.format)))
+    finally:
+        hashing_pool.shutdown()
+        await engine.dispose()
+
+
+async def export_command(args: argparse.Namespace) -> None:
+    try:
+        with _open(args.file, "w") as file:
+            await export_users(
+                file, _format(args.file, args.format), batch_size=args.chunk_size
+            )
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.users",
+        description="Import and export users in CSV or JSONL",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import")
+    import_parser.add_argument("file", help="CSV/JSONL file, - for stdin")
+    import_parser.add_argument("--format", choices=["csv", "jsonl"])
+    import_parser.add_argument("--chunk-size", type=int, default=1000)
+    import_parser.add_argument(
+        "--on-conflict", choices=["skip", "fail"], default="skip"
+    )
+    import_parser.add_argument(
+        "--executor",
+        choices=["thread", "process"],
+        default=settings.hashing_pool.executor,
+    )
+    import_parser.add_argument(
+        "--workers", type=int, default=settings.hashing_pool.max_workers
+    )
+    import_parser.set_defaults(handler=import_command)
+
+    export_parser = commands.add_parser("export")
+    export_parser.add_argument("file", help="CSV/JSONL file, - for stdout")
+    export_parser.add_argument("--format", choices=["csv", "jsonl"])
+    export_parser.add_argument("--chunk-size", type=int, default=1000)
+    export_parser.set_defaults(handler=export_command)
+
+    args = parser.parse_args()
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    main()
@@ -0,0 +1,146 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Set, Tuple
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from aiosmtpd.smtp import SMTP, Envelope, Session
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+class FakeSMSGateway:
+    """
+    Локальный шлюз с API sms/send как у SMS Aero.
+
+    Ответы задаются очередью reply: (HTTP-статус, тело, задержка в секундах).
+    Тело - dict (отдается как JSON) или строка. Когда очередь пуста, шлюз
+    отвечает успехом с номерами из запроса. Принятые запросы сохраняются
+    в requests.
+    """
+
+    def __init__(self) -> None:
+        self.replies: List[Tuple[int, Any, float]] = []
+        self.requests: List[Dict[str, Any]] = []
+        self.authorization: List[Optional[str]] = []
+        self.url = ""
+        self._server: Optional[TestServer] = None
+
+    def reply(self, status: int, body: Any = None, delay: float = 0.0) -> None:
+        self.replies.append((status, body, delay))
+
+    @staticmethod
+    def _accepted(payload: Dict[str, Any]) -> Dict[str, Any]:
+        if "numbers" in payload:
+            data: Any = [
+                {"id": index, "number": number, "extendStatus": "queue"}
+                for index, number in enumerate(payload["numbers"], start=1)
+            ]
+        else:
+            data = {"id": 1, "number": payload["number"], "extendStatus": "queue"}
+        return {"success": True, "data": data}
+
+    async def _send(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        self.requests.append(payload)
+        self.authorization.append(request.headers.get("Authorization"))
+        if not self.replies:
+            return web.json_response(self._accepted(payload))
+
+        status, body, delay = self.replies.pop(0)
+        if delay:
+            await asyncio.sleep(delay)
+        if isinstance(body, str):
+            return web.Response(status=status, text=body)
+        return web.json_response(body, status=status)
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post("/v2/sms/send", self._send)
+        self._server = TestServer(app)
+        await self._server.start_server()
+        self.url = str(self._server.make_url("/v2/"))
+
+    async def close(self) -> None:
+        if self._server is not None:
+            await self._server.close()
+
+
+@pytest.fixture
+async def sms_gateway(anyio_backend):
+    gateway = FakeSMSGateway()
+    await gateway.start()
+    yield gateway
+    await gateway.close()
+
+
+class SMTPSink:
+    """
+    Локальный SMTP-сервер (aiosmtpd), который принимает письма и хранит их
+    в messages вместо доставки.
+
+    Получатели из rejected отклоняются кодом 550. Открытые сервером
+    соединения сохраняются в connections, drop_connections() разрывает их,
+    как это делает реальный сервер с простаивающими соединениями.
+    """
+
+    def __init__(self) -> None:
+        self.messages: List[Envelope] = []
+        self.rejected: Set[str] = set()
+        self.connections: List[asyncio.Transport] = []
+        self.port = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def handle_RCPT(
+        self,
+        server: SMTP,
+        session: Session,
+        envelope: Envelope,
+        address: str,
+        rcpt_options: List[str],
+    ) -> str:
+        if address in self.rejected:
+            return "550 5.1.1 Mailbox unavailable"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(
+        self, server: SMTP, session: Session, envelope: Envelope
+    ) -> str:
+        self.messages.append(envelope)
+        return "250 Message accepted for delivery"
+
+    def _protocol(self) -> SMTP:
+        sink = self
+
+        class Protocol(SMTP):
+            def connection_made(self, transport: asyncio.BaseTransport) -> None:
+                sink.connections.append(transport)
+                super().connection_made(transport)
+
+        return Protocol(self, hostname="localhost")
+
+    def drop_connections(self) -> None:
+        for transport in self.connections:
+            transport.close()
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(self._protocol, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        self.drop_connections()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+@pytest.fixture
+async def smtp_sink(anyio_backend):
+    sink = SMTPSink()
+    await sink.start()
+    yield sink
+    await sink.close()
@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from fastapi import APIRouter, FastAPI
+from prometheus_client import REGISTRY
+
+
+from src.monitoring.metrics import PrometheusMiddleware, track_query
+
+
+pytestmark = pytest.mark.anyio
+
+
+router = APIRouter(prefix="/auth")
+
+
+@router.get("/user/me/")
+async def me():
+    return {}
+
+
+@router.get("/user/{user_id}/")
+async def user(user_id: int):
+    return {}
+
+
+app = FastAPI()
+app.include_router(router, prefix="/api")
+app.add_middleware(PrometheusMiddleware)
+
+
+async def get(path: str) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+
+def requests_total(route: str, status: int) -> float:
+    value = REGISTRY.get_sample_value(
+        "http_requests_total",
+        {"method": "GET", "route": route, "status": str(status)},
+    )
+    return value or 0.0
+
+
+@pytest.mark.parametrize(
+    "path, route, status",
+    [
+        ("/api/auth/user/me/", "/api/auth/user/me/", 200),
+        ("/api/auth/user/42/", "/api/auth/user/{user_id}/", 200),
+        ("/api/auth/user/abc/", "/api/auth/user/{user_id}/", 422),
+        ("/auth/user/me/", "unmatched", 404),
+    ],
+)
+async def test_request_metrics_are_labelled_with_full_route_template(
+    path, route, status
+):
+    before = requests_total(route, status)
+
+    assert await get(path) == status
+
+    assert requests_total(route, status) == before + 1
+
+
+class BatchDao:
+    @classmethod
+    @track_query
+    async def iter_batches(cls, batches: int):
+        for batch in range(batches):
+            await asyncio.sleep(0.01)
+            yield [batch]
+
+
+async def test_generator_query_time_excludes_consumer():
+    labels = {"dao": "BatchDao", "method": "iter_batches"}
+
+    batches = []
+    async for batch in BatchDao.iter_batches(3):
+        batches.append(batch)
+        await asyncio.sleep(0.1)
+
+    assert batches == [[0], [1], [2]]
+    assert REGISTRY.get_sample_value("db_query_duration_seconds_count", labels) == 1
+    assert 0.03 <= REGISTRY.get_sample_value("db_query_duration_seconds_sum", labels) < 0.2
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+import fakeredis
+import pytest
+
+
+from src.auth import schemas as auth_schemas
+from src.otp.store import RedisOTPStore
+from src.ratelimit.limiter import RedisRateLimiter
+from src.settings import RateLimitRule
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        "redis.asyncio.from_url",
+        lambda url: fakeredis.FakeAsyncRedis(server=server),
+    )
+    return fakeredis.FakeAsyncRedis(server=server)
+
+
+@pytest.fixture
+async def otp_store(fake_redis):
+    store = RedisOTPStore(prefix="test:temp_user")
+    yield store
+    await store.close()
+
+
+@pytest.fixture
+async def rate_limiter(fake_redis):
+    limiter = RedisRateLimiter(prefix="test:ratelimit")
+    yield limiter
+    await limiter.close()
+
+
+def temp_user_data(minutes: int = 1) -> auth_schemas.TempUserCreateDB:
+    return auth_schemas.TempUserCreateDB(
+        email="user@example.com",
+        hashed_password="hash",
+        exp=datetime.now() + timedelta(minutes=minutes),
+        otp_code="code-hmac",
+    )
+
+
+async def test_otp_store_round_trip(otp_store):
+    data = temp_user_data()
+
+    first = await otp_store.add(None, data)
+    second = await otp_store.add(None, data)
+    temp_user = await otp_store.get(None, first)
+
+    assert second == first + 1
+    assert temp_user.id == first
+    assert temp_user.email == data.email
+    assert temp_user.otp_code == data.otp_code
+    assert temp_user.exp == data.exp
+
+
+async def test_otp_store_expires_with_code(otp_store, fake_redis):
+    id = await otp_store.add(None, temp_user_data(minutes=2))
+
+    ttl = await fake_redis.ttl(f"test:temp_user:{id}")
+
+    assert 110 <= ttl <= 120
+
+
+async def test_otp_store_delete(otp_store):
+    id = await otp_store.add(None, temp_user_data())
+
+    assert await otp_store.delete(None, id)
+    assert await otp_store.get(None, id) is None
+    assert not await otp_store.delete(None, id)
+
+
+async def test_rate_limiter_rejects_after_capacity(rate_limiter):
+    rule = RateLimitRule(capacity=2, period_seconds=60)
+
+    assert await rate_limiter.hit([("login:ip:1", rule)]) == 0
+    assert await rate_limiter.hit([("login:ip:1", rule)]) == 0
+    retry_after = await rate_limiter.hit([("login:ip:1", rule)])
+
+    # Токен появляется раз в period_seconds / capacity секунд
+    assert 0 < retry_after <= 30
+    assert await rate_limiter.hit([("login:ip:2", rule)]) == 0
+
+
+async def test_rate_limiter_charges_buckets_only_when_allowed(rate_limiter):
+    ip_rule = RateLimitRule(capacity=10, period_seconds=60)
+    identifier_rule = RateLimitRule(capacity=1, period_seconds=60)
+    checks = [("login:ip:1", ip_rule), ("login:identifier:a", identifier_rule)]
+
+    assert await rate_limiter.hit(checks) == 0
+    for _ in range(5):
+        assert await rate_limiter.hit(checks) > 0
+
+    # Отклоненные запросы не списали токены с корзины IP
+    for _ in range(9):
+        assert await rate_limiter.hit([("login:ip:1", ip_rule)]) == 0
+    assert await rate_limiter.hit([("login:ip:1", ip_rule)]) > 0
+
+
+async def test_rate_limiter_buckets_expire(rate_limiter, fake_redis):
+    rule = RateLimitRule(capacity=5, period_seconds=10)
+
+    await rate_limiter.hit([("otp:ip:1", rule)])
+
+    ttl = await fake_redis.ttl("test:ratelimit:otp:ip:1")
+    assert 0 < ttl <= 11
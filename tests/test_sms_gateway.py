@@ -0,0 +1,149 @@
+import pytest
+
+
+from src.sms.service import SMSGatewayClient
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def client(sms_gateway):
+    client = SMSGatewayClient(
+        gate_url=sms_gateway.url,
+        email="user@example.com",
+        api_key="key",
+        timeout=0.2,
+        max_retries=2,
+        backoff_seconds=0,
+    )
+    yield client
+    await client.close()
+
+
+async def test_send_parses_accepted_message(client, sms_gateway):
+    result = await client.send("79990000000", "123456")
+
+    assert result.success
+    assert result.message_id == 1
+    assert result.status == "queue"
+    assert result.attempts == 1
+    assert sms_gateway.requests == [
+        {"number": "79990000000", "text": "123456", "sign": "SMS Aero"}
+    ]
+    # Учетные данные передаются в заголовке, а не в URL
+    assert sms_gateway.authorization[0].startswith("Basic ")
+
+
+async def test_send_retries_server_errors(client, sms_gateway):
+    sms_gateway.reply(500, {"success": False})
+    sms_gateway.reply(502, "Bad Gateway")
+
+    result = await client.send("79990000000", "123456")
+
+    assert result.success
+    assert result.attempts == 3
+    assert len(sms_gateway.requests) == 3
+
+
+async def test_send_gives_up_after_max_retries(client, sms_gateway):
+    for _ in range(3):
+        sms_gateway.reply(503, "Service Unavailable")
+
+    result = await client.send("79990000000", "123456")
+
+    assert not result.success
+    assert result.error == "Gateway server error"
+    assert result.attempts == 3
+    assert len(sms_gateway.requests) == 3
+
+
+async def test_send_retries_timeouts(client, sms_gateway):
+    sms_gateway.reply(200, {"success": True, "data": {"id": 7}}, delay=1.0)
+
+    result = await client.send("79990000000", "123456")
+
+    assert result.success
+    assert result.message_id == 1
+    assert result.attempts == 2
+
+
+async def test_send_reports_timeout_error(client, sms_gateway):
+    for _ in range(3):
+        sms_gateway.reply(200, {"success": True, "data": {"id": 7}}, delay=1.0)
+
+    result = await client.send("79990000000", "123456")
+
+    assert not result.success
+    assert result.error.startswith("TimeoutError")
+    assert result.attempts == 3
+
+
+async def test_send_does_not_retry_rejected_message(client, sms_gateway):
+    sms_gateway.reply(400, {"success": False, "message": "Invalid number"})
+
+    result = await client.send("1", "123456")
+
+    assert not result.success
+    assert result.error == "Invalid number"
+    assert result.attempts == 1
+
+
+@pytest.mark.parametrize(
+    "body, error",
+    [
+        ("not json", "Unexpected gateway response"),
+        ({"success": True, "data": None}, "Gateway rejected the message"),
+        ({"success": False}, "Gateway rejected the message"),
+    ],
+)
+async def test_send_handles_malformed_responses(client, sms_gateway, body, error):
+    sms_gateway.reply(200, body)
+
+    result = await client.send("79990000000", "123456")
+
+    assert not result.success
+    assert result.error == error
+
+
+async def test_send_bulk_matches_results_by_number(client, sms_gateway):
+    sms_gateway.reply(
+        200,
+        {
+            "success": True,
+            "data": [
+                {"id": 2, "number": 79990000002, "extendStatus": "queue"},
+                {"id": 1, "number": 79990000001, "extendStatus": "queue"},
+            ],
+        },
+    )
+
+    results = await client.send_bulk(
+        ["79990000001", "79990000002", "79990000003"], "Hello"
+    )
+
+    assert [result.message_id for result in results] == [1, 2, None]
+    assert results[2].error == "No status for the number"
+
+
+async def test_send_many_groups_identical_texts(client, sms_gateway):
+    results = await client.send_many(
+        [
+            ("79990000001", "Hello"),
+            ("79990000002", "Hello"),
+            ("79990000003", "Other"),
+        ]
+    )
+
+    assert all(result.success for result in results)
+    assert sorted(sms_gateway.requests, key=str) == sorted(
+        [
+            {
+                "numbers": ["79990000001", "79990000002"],
+                "text": "Hello",
+                "sign": "SMS Aero",
+            },
+            {"number": "79990000003", "text": "Other", "sign": "SMS Aero"},
+        ],
+        key=str,
+    )
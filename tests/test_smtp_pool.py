@@ -0,0 +1,115 @@
+import asyncio
+from email.mime.text import MIMEText
+from typing import List, Tuple
+import aiosmtplib
+import pytest
+from prometheus_client import REGISTRY
+
+
+from src.email.service import SMTPConnectionPool
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def pool(smtp_sink):
+    pool = SMTPConnectionPool(
+        hostname="127.0.0.1",
+        port=smtp_sink.port,
+        username=None,
+        password=None,
+        start_tls=False,
+        size=2,
+        timeout=5,
+        idle_timeout=60,
+    )
+    yield pool
+    await pool.close()
+
+
+def messages(*recipients: str) -> List[Tuple[MIMEText, List[str]]]:
+    batch = []
+    for recipient in recipients:
+        msg = MIMEText("123456")
+        msg["From"] = "noreply@example.com"
+        msg["To"] = recipient
+        msg["Subject"] = "Код подтверждения"
+        batch.append((msg, [recipient]))
+    return batch
+
+
+async def test_send_many_reuses_connection_across_batches(pool, smtp_sink):
+    first = await pool.send_many(messages("a@example.com", "b@example.com"))
+    second = await pool.send_many(messages("c@example.com"))
+    await pool.send(*messages("d@example.com")[0])
+
+    assert first == [None, None]
+    assert second == [None]
+    assert [message.rcpt_tos for message in smtp_sink.messages] == [
+        ["a@example.com"],
+        ["b@example.com"],
+        ["c@example.com"],
+        ["d@example.com"],
+    ]
+    assert len(smtp_sink.connections) == 1
+
+
+async def test_replaces_idle_connection_closed_by_server(pool, smtp_sink):
+    assert await pool.send_many(messages("a@example.com")) == [None]
+
+    smtp_sink.drop_connections()
+    _, client = pool._idle[-1]
+    while client.is_connected:
+        await asyncio.sleep(0.01)
+    results = await pool.send_many(messages("b@example.com", "c@example.com"))
+
+    assert results == [None, None]
+    assert len(smtp_sink.messages) == 3
+    assert len(smtp_sink.connections) == 2
+
+
+async def test_reconnects_when_server_drops_connection_mid_batch(pool, smtp_sink):
+    reconnects = REGISTRY.get_sample_value("smtp_reconnects_total")
+    assert await pool.send_many(messages("a@example.com")) == [None]
+
+    # Клиент еще не узнал о разрыве: ошибку дает первая же команда
+    smtp_sink.drop_connections()
+    results = await pool.send_many(messages("b@example.com", "c@example.com"))
+
+    assert results == [None, None]
+    assert [message.rcpt_tos for message in smtp_sink.messages] == [
+        ["a@example.com"],
+        ["b@example.com"],
+        ["c@example.com"],
+    ]
+    assert len(smtp_sink.connections) == 2
+    assert REGISTRY.get_sample_value("smtp_reconnects_total") == reconnects + 1
+
+
+async def test_rejected_recipient_fails_only_its_message(pool, smtp_sink):
+    smtp_sink.rejected.add("missing@example.com")
+
+    results = await pool.send_many(
+        messages("a@example.com", "missing@example.com", "b@example.com")
+    )
+
+    assert results[0] is None
+    assert isinstance(results[1], aiosmtplib.SMTPRecipientsRefused)
+    assert results[2] is None
+    assert [message.rcpt_tos for message in smtp_sink.messages] == [
+        ["a@example.com"],
+        ["b@example.com"],
+    ]
+    assert len(smtp_sink.connections) == 1
+
+
+async def test_send_raises_for_rejected_recipient(pool, smtp_sink):
+    smtp_sink.rejected.add("missing@example.com")
+
+    with pytest.raises(aiosmtplib.SMTPRecipientsRefused):
+        await pool.send(*messages("missing@example.com")[0])
+    await pool.send(*messages("a@example.com")[0])
+
+    assert len(smtp_sink.messages) == 1
+    assert len(smtp_sink.connections) == 1